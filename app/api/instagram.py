@@ -1,10 +1,10 @@
-import requests
 from app.core.config import settings
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from pydantic import BaseModel
 from datetime import datetime
 from app.core.scheduler import scheduler
 from app.clients.instagram import InstagramClient
+from app.services.outbox import outbox
 
 router = APIRouter()
 instagram_client = InstagramClient()
@@ -21,33 +21,52 @@ class MediaMessage(BaseModel):
     scheduled_time: datetime = None
 
 @router.post("/send")
-async def send_instagram_message(message: InstagramMessage):
+async def send_instagram_message(message: InstagramMessage, http_response: Response):
     if message.scheduled_time:
-        job_id = scheduler.schedule_instagram_message(
+        job_id = await scheduler.schedule_instagram_message(
             message.recipient_id,
             message.message,
             message.scheduled_time
         )
         return {"job_id": job_id}
-    
-    response = instagram_client.send_message(
+
+    if settings.OUTBOX_MODE:
+        outbox_id = await outbox.enqueue("instagram", "text", message.recipient_id, {"message": message.message})
+        http_response.status_code = 202
+        return {"outbox_id": outbox_id, "status": "pending"}
+
+    response = await instagram_client.send_message(
         message.recipient_id,
         message.message
     )
     return response
 
+@router.delete("/schedule/{job_id}")
+async def cancel_scheduled_instagram_message(job_id: str):
+    if not await scheduler.cancel_message(job_id):
+        raise HTTPException(status_code=404, detail=f"Scheduled job {job_id} not found")
+    return {"message": f"Scheduled job {job_id} cancelled"}
+
 @router.post("/send-media")
-async def send_instagram_media(message: MediaMessage):
+async def send_instagram_media(message: MediaMessage, http_response: Response):
     if message.scheduled_time:
-        job_id = scheduler.schedule_instagram_media(
+        job_id = await scheduler.schedule_instagram_media(
             message.recipient_id,
             message.media_url,
             message.media_type,
             message.scheduled_time
         )
         return {"job_id": job_id}
-    
-    response = instagram_client.send_media(
+
+    if settings.OUTBOX_MODE:
+        outbox_id = await outbox.enqueue("instagram", "media", message.recipient_id, {
+            "media_url": message.media_url,
+            "media_type": message.media_type
+        })
+        http_response.status_code = 202
+        return {"outbox_id": outbox_id, "status": "pending"}
+
+    response = await instagram_client.send_media(
         message.recipient_id,
         message.media_url,
         message.media_type
@@ -0,0 +1,28 @@
+import time
+from fastapi import APIRouter, HTTPException, Query
+from app.services.outbox import outbox
+from app.utils.db import get_outbox_counts, get_outbox_entry, list_dead_letters, requeue_dead_letter
+
+router = APIRouter()
+
+@router.get("/stats")
+async def get_outbox_stats():
+    """Outbox rows by status and drain worker counters"""
+    return {"counts": await get_outbox_counts(), "drainer": outbox.stats()}
+
+@router.get("/dead-letters")
+async def get_dead_letters(limit: int = Query(100, ge=1, le=1000)):
+    return await list_dead_letters(limit)
+
+@router.post("/dead-letters/{outbox_id}/retry")
+async def retry_dead_letter(outbox_id: str):
+    if not await requeue_dead_letter(outbox_id, time.time()):
+        raise HTTPException(status_code=404, detail=f"Dead letter {outbox_id} not found")
+    return {"outbox_id": outbox_id, "status": "pending"}
+
+@router.get("/{outbox_id}")
+async def get_outbox_status(outbox_id: str):
+    entry = await get_outbox_entry(outbox_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Outbox message {outbox_id} not found")
+    return entry
@@ -1,15 +1,64 @@
 
+from datetime import datetime, timedelta
+from typing import Literal, Optional
 from fastapi import APIRouter
-from app.utils.db import get_message_stats
+from app.models.stats import DashboardStats, Timeseries
+from app.utils.db import db, get_message_stats, get_message_timeseries
+from app.clients.breaker import circuit_breakers
+from app.clients.governor import governor
+from app.services.dispatcher import dispatch_stats
+from app.services.webhooks import webhook_ingestor
 
+# Return annotations let FastAPI serialize with Pydantic instead of jsonable_encoder
 router = APIRouter()
 
 @router.get("/dashboard")
-async def get_dashboard_stats():
+async def get_dashboard_stats() -> DashboardStats:
     stats = await get_message_stats()
     return {
         "total_messages": stats.get("total", 0),
         "whatsapp_messages": stats.get("whatsapp", 0),
         "instagram_messages": stats.get("instagram", 0),
+        "status_counts": stats.get("by_status", {}),
         "recent_messages": stats.get("recent", [])
-    }
\ No newline at end of file
+    }
+
+@router.get("/timeseries")
+async def get_timeseries(
+    granularity: Literal["minute", "hour", "day"] = "hour",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    platform: Optional[str] = None,
+    template_name: Optional[str] = None
+) -> Timeseries:
+    """Send volume and delivery rate per time bucket (UTC), defaulting to the last 24 hours"""
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=1)
+    series = await get_message_timeseries(granularity, start, end, platform, template_name)
+    return {"granularity": granularity, "series": series}
+
+@router.get("/dispatch")
+async def get_dispatch_stats() -> dict:
+    """Throughput and latency of batch sends since startup"""
+    return dispatch_stats.snapshot()
+
+@router.get("/database")
+async def get_database_stats() -> dict:
+    """Read pool utilization, writer backlog and health"""
+    await db.check_health()
+    return db.stats()
+
+@router.get("/webhooks")
+async def get_webhook_stats() -> dict:
+    """Webhook ingestion queue depth and processed event counts"""
+    return webhook_ingestor.stats()
+
+@router.get("/governor")
+async def get_governor_stats() -> dict:
+    """Current outbound send rate per sender"""
+    return governor.stats()
+
+@router.get("/circuits")
+async def get_circuit_stats() -> dict:
+    """Circuit breaker state per Graph endpoint and account"""
+    return circuit_breakers.stats()
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
+from app.core.config import settings
 from app.models.templates import WhatsAppTemplate, TemplateMessage
-from app.api.whatsapp import WhatsAppClient
+from app.clients.whatsapp import WhatsAppClient
 from app.core.scheduler import scheduler
 from typing import List
+from app.services.template_cache import template_catalog, TemplateCatalogError
+from app.services.outbox import outbox
 
 router = APIRouter()
 whatsapp_client = WhatsAppClient()
@@ -10,29 +13,52 @@ whatsapp_client = WhatsAppClient()
 @router.post("/create")
 async def create_template(template: WhatsAppTemplate):
     """Create a new WhatsApp message template"""
-    response = whatsapp_client.create_template(template)
+    response = await whatsapp_client.create_template(template)
     if "error" in response:
         raise HTTPException(status_code=400, detail=response["error"])
+    template_catalog.invalidate()
     return response
 
 @router.get("/list")
 async def list_templates() -> List[dict]:
     """Get all available templates"""
-    response = whatsapp_client.get_templates()
-    return response.get("data", [])
+    try:
+        return await template_catalog.list()
+    except TemplateCatalogError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+@router.get("/{template_name}")
+async def get_template(template_name: str, language_code: str = "en"):
+    """Look up a template by name and language"""
+    try:
+        template = await template_catalog.get(template_name, language_code)
+    except TemplateCatalogError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    if template is None:
+        raise HTTPException(status_code=404, detail=f"Template {template_name} ({language_code}) not found")
+    return template
 
 @router.delete("/{template_name}")
 async def delete_template(template_name: str):
     """Delete a template"""
-    response = whatsapp_client.delete_template(template_name)
+    response = await whatsapp_client.delete_template(template_name)
     if "error" in response:
         raise HTTPException(status_code=400, detail=response["error"])
+    template_catalog.invalidate()
     return {"message": f"Template {template_name} deleted successfully"}
 
 @router.post("/send")
-async def send_template_message(message: TemplateMessage):
+async def send_template_message(message: TemplateMessage, http_response: Response):
     """Send a template message"""
-    response = whatsapp_client.send_template(
+    if settings.OUTBOX_MODE:
+        outbox_id = await outbox.enqueue("whatsapp", "template", message.recipient, {
+            "template_name": message.template_name,
+            "language_code": message.language_code
+        })
+        http_response.status_code = 202
+        return {"outbox_id": outbox_id, "status": "pending"}
+
+    response = await whatsapp_client.send_template(
         message.recipient,
         message.template_name,
         message.language_code
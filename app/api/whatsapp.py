@@ -1,89 +1,32 @@
-import requests
+from typing import List, Optional
 from app.core.config import settings
 from app.models.templates import WhatsAppTemplate, TemplateMessage
-from fastapi import APIRouter, HTTPException, Request
-from app.models.messages import ScheduledMessage, MessageResponse
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from app.models.messages import ScheduledMessage, BatchMessage, TemplateContent, StoredMessage, InboundMessage
 from app.core.scheduler import scheduler
 from app.clients.whatsapp import WhatsAppClient
-from circuitbreaker import circuit
-from fastapi import UploadFile, File
-import tempfile
-import os
+from app.services.whatsapp import WhatsAppService
+from app.services.template_cache import template_catalog, TemplateCatalogError
+from app.services.webhooks import webhook_ingestor
+from app.services.outbox import outbox
+from app.services.campaigns import schedule_campaign, cancel_campaign, get_campaign_progress
+from app.utils.db import get_inbound_messages
+from app.utils.csv_stream import csv_upload_chunks
+from app.middleware.auth import verify_webhook_signature
 
 router = APIRouter()
 whatsapp_client = WhatsAppClient()
 
-class WhatsAppClient:
-    def __init__(self):
-        self.api_url = f"https://graph.facebook.com/v21.0/{settings.WHATSAPP_PHONE_NUMBER_ID}/messages"
-        self.headers = {
-            "Authorization": f"Bearer {settings.WHATSAPP_API_TOKEN}",
-            "Content-Type": "application/json"
-        }
-        self.base_url = f"https://graph.facebook.com/v21.0/{settings.WHATSAPP_PHONE_NUMBER_ID}"
-
-    @circuit(failure_threshold=5, recovery_timeout=60)
-    async def send_message(self, to_phone: str, message: str):
-        payload = {
-            "messaging_product": "whatsapp",
-            "recipient_type": "individual",
-            "to": to_phone,
-            "type": "text",
-            "text": {"body": message}
-        }
-        
-        response = requests.post(self.api_url, headers=self.headers, json=payload)
-        return response.json()
-
-    def send_template(self, to_phone: str, template_name: str, language_code: str = "en_US"):
-        payload = {
-            "messaging_product": "whatsapp",
-            "to": to_phone,
-            "type": "template",
-            "template": {
-                "name": template_name,
-                "language": {
-                    "code": language_code
-                }
-            }
-        }
-        
-        response = requests.post(self.api_url, headers=self.headers, json=payload)
-        return response.json()
-
-    def create_template(self, template: WhatsAppTemplate):
-        url = f"https://graph.facebook.com/v21.0/{settings.WHATSAPP_BUSINESS_ID}/message_templates"
-        payload = {
-            "name": template.name,
-            "language": template.language_code,
-            "category": template.category,
-            "components": [comp.dict() for comp in template.components]
-        }
-        response = requests.post(url, headers=self.headers, json=payload)
-        return response.json()
-
-    def get_templates(self):
-        url = f"https://graph.facebook.com/v21.0/{settings.WHATSAPP_BUSINESS_ID}/message_templates"
-        response = requests.get(url, headers=self.headers)
-        return response.json()
-
-    def delete_template(self, template_name: str):
-        url = f"https://graph.facebook.com/v21.0/{settings.WHATSAPP_BUSINESS_ID}/message_templates"
-        payload = {"name": template_name}
-        response = requests.delete(url, headers=self.headers, json=payload)
-        return response.json()
-
 @router.post("/webhook")
 async def webhook_handler(request: Request):
-    body = await request.json()
-    if "messages" in body["entry"][0]["changes"][0]["value"]:
-        message = body["entry"][0]["changes"][0]["value"]["messages"][0]
-        return MessageResponse(
-            from_number=message["from"],
-            message=message["text"]["body"],
-            timestamp=message["timestamp"]
-        )
-    return {"status": "no_message"}
+    # The route is public, so only payloads signed with the app secret count
+    body = await request.body()
+    if not verify_webhook_signature(body, request.headers.get("X-Hub-Signature-256")):
+        raise HTTPException(status_code=403, detail="Invalid webhook signature")
+    # Acknowledge right away; payloads are parsed and stored by the ingestor
+    if not webhook_ingestor.submit(body):
+        raise HTTPException(status_code=503, detail="Webhook queue is full")
+    return {"status": "received"}
 
 @router.get("/webhook")
 async def verify_webhook(token: str):
@@ -93,15 +36,26 @@ async def verify_webhook(token: str):
 
 @router.post("/schedule")
 async def schedule_message(message: ScheduledMessage):
-    job_id = scheduler.schedule_message(
+    job_id = await scheduler.schedule_message(
         message.recipient,
         message.message,
         message.scheduled_time
     )
     return {"job_id": job_id}
 
+@router.delete("/schedule/{job_id}")
+async def cancel_scheduled_message(job_id: str):
+    if not await scheduler.cancel_message(job_id):
+        raise HTTPException(status_code=404, detail=f"Scheduled job {job_id} not found")
+    return {"message": f"Scheduled job {job_id} cancelled"}
+
 @router.post("/send")
-async def send_message(message: ScheduledMessage):
+async def send_message(message: ScheduledMessage, http_response: Response):
+    if settings.OUTBOX_MODE:
+        outbox_id = await outbox.enqueue("whatsapp", "text", message.recipient, {"message": message.message})
+        http_response.status_code = 202
+        return {"outbox_id": outbox_id, "status": "pending"}
+
     response = await whatsapp_client.send_message(
         message.recipient,
         message.message
@@ -110,26 +64,38 @@ async def send_message(message: ScheduledMessage):
 
 @router.post("/create")
 async def create_template(template: WhatsAppTemplate):
-    response = whatsapp_client.create_template(template)
+    response = await whatsapp_client.create_template(template)
     if "error" in response:
         raise HTTPException(status_code=400, detail=response["error"])
+    template_catalog.invalidate()
     return response
 
 @router.get("/list")
 async def list_templates():
-    response = whatsapp_client.get_templates()
-    return response.get("data", [])
+    try:
+        return await template_catalog.list()
+    except TemplateCatalogError as e:
+        raise HTTPException(status_code=502, detail=str(e))
 
 @router.delete("/{template_name}")
 async def delete_template(template_name: str):
-    response = whatsapp_client.delete_template(template_name)
+    response = await whatsapp_client.delete_template(template_name)
     if "error" in response:
         raise HTTPException(status_code=400, detail=response["error"])
+    template_catalog.invalidate()
     return {"message": f"Template {template_name} deleted successfully"}
 
 @router.post("/send_template")
-async def send_template_message(message: TemplateMessage):
-    response = whatsapp_client.send_template(
+async def send_template_message(message: TemplateMessage, http_response: Response):
+    if settings.OUTBOX_MODE:
+        outbox_id = await outbox.enqueue("whatsapp", "template", message.recipient, {
+            "template_name": message.template_name,
+            "language_code": message.language_code
+        })
+        http_response.status_code = 202
+        return {"outbox_id": outbox_id, "status": "pending"}
+
+    response = await whatsapp_client.send_template(
         message.recipient,
         message.template_name,
         message.language_code
@@ -138,7 +104,7 @@ async def send_template_message(message: TemplateMessage):
 
 @router.post("/send_scheduled")
 async def send_scheduled_message(message: ScheduledMessage):
-    job_id = scheduler.schedule_message(
+    job_id = await scheduler.schedule_message(
         message.recipient,
         message.message,
         message.scheduled_time
@@ -147,35 +113,68 @@ async def send_scheduled_message(message: ScheduledMessage):
 
 @router.post("/batch/template")
 async def send_batch_template(batch_msg: BatchMessage):
-    """Send template message to multiple recipients"""
+    """Send template message to multiple recipients, or schedule it as a campaign"""
+    if batch_msg.scheduled_time:
+        return await schedule_campaign(batch_msg)
+
     whatsapp_service = WhatsAppService()
     results = await whatsapp_service.send_batch_template(batch_msg)
-    return {"results": results}
+    return {"results": results, "stats": whatsapp_service.dispatcher.stats.snapshot()}
+
+@router.get("/history/{phone_number}")
+async def get_chat_history(phone_number: str, limit: int = Query(100, ge=1, le=1000)) -> List[StoredMessage]:
+    return await WhatsAppService().get_chat_history(phone_number, limit)
+
+@router.get("/inbound/{contact}")
+async def get_inbound_history(contact: str, limit: int = Query(100, ge=1, le=1000)) -> List[InboundMessage]:
+    return await get_inbound_messages(contact, limit)
+
+@router.get("/campaigns/{campaign_id}")
+async def get_campaign_status(campaign_id: str):
+    campaign = await get_campaign_progress(campaign_id)
+    if campaign is None:
+        raise HTTPException(status_code=404, detail=f"Campaign {campaign_id} not found")
+    return campaign
+
+@router.delete("/campaigns/{campaign_id}")
+async def cancel_campaign_route(campaign_id: str):
+    if not await cancel_campaign(campaign_id):
+        raise HTTPException(status_code=404, detail=f"No active campaign {campaign_id}")
+    return {"message": f"Campaign {campaign_id} cancelled"}
 
 @router.post("/batch/from-csv")
 async def send_batch_from_csv(
+    request: Request,
     template_name: str,
-    file: UploadFile = File(...),
-    language_code: str = "en"
+    language_code: str = "en",
+    body: Optional[str] = None
 ):
-    """Send template message to recipients from CSV file"""
-    whatsapp_service = WhatsAppService()
-    
-    # Save uploaded file temporarily
-    with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-        contents = await file.read()
-        temp_file.write(contents)
-        temp_path = temp_file.name
+    """Send template message to recipients from a CSV upload.
 
+    The CSV is either the raw request body (text/csv) or the ``file`` field
+    of a multipart form. Recipients are parsed, validated and sent while the
+    body is still arriving, and only counts are returned so memory stays
+    flat however large the file is.
+    """
     try:
-        recipients = await whatsapp_service.process_csv_recipients(temp_path)
-        batch_msg = BatchMessage(
-            template_name=template_name,
-            language_code=language_code,
-            recipients=recipients
-        )
-        results = await whatsapp_service.send_batch_template(batch_msg)
-        return {"results": results}
-    finally:
-        os.unlink(temp_path)  # Clean up temp file
+        chunks = csv_upload_chunks(request.headers.get("content-type", ""), request.stream())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
+    whatsapp_service = WhatsAppService()
+    batch_msg = BatchMessage(
+        template_name=template_name,
+        language_code=language_code,
+        recipients=[],
+        content=TemplateContent(body=body) if body is not None else None
+    )
+    await whatsapp_service.send_batch_template(
+        batch_msg,
+        whatsapp_service.stream_csv_recipients(chunks),
+        collect=False
+    )
+    return {
+        "csv": whatsapp_service.csv_counts,
+        "errors": whatsapp_service.error_counts,
+        "stats": whatsapp_service.dispatcher.stats.snapshot()
+    }
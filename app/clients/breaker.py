@@ -0,0 +1,162 @@
+import logging
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Tuple
+from urllib.parse import urlsplit
+from app.core.config import settings
+from app.utils.metrics import circuit_state
+
+logger = logging.getLogger(__name__)
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open"""
+
+    def __init__(self, endpoint: str, account: str, retry_after: float):
+        super().__init__(f"Circuit open for {endpoint} on {account}, retry in {retry_after:.1f}s")
+        self.endpoint = endpoint
+        self.account = account
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker for one Graph endpoint and account.
+
+    Outcomes are counted in one-second buckets over CIRCUIT_WINDOW_SECONDS.
+    Once at least CIRCUIT_MIN_REQUESTS calls were seen and the failure
+    rate reaches CIRCUIT_FAILURE_RATE the circuit opens and calls fail
+    immediately. After CIRCUIT_OPEN_SECONDS up to CIRCUIT_HALF_OPEN_PROBES
+    calls are let through; if they all succeed the circuit closes, any
+    failure opens it again.
+    """
+
+    def __init__(self, endpoint: str, account: str):
+        self.endpoint = endpoint
+        self.account = account
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probes = 0
+        self.probe_successes = 0
+        # (second, successes, failures)
+        self._window: deque = deque()
+        self._successes = 0
+        self._failures = 0
+        self._set_state(CLOSED)
+
+    def check(self):
+        """Raise CircuitOpenError if a call would be refused, without admitting one"""
+        if self.state == OPEN:
+            remaining = self.opened_at + settings.CIRCUIT_OPEN_SECONDS - time.monotonic()
+            if remaining > 0:
+                raise CircuitOpenError(self.endpoint, self.account, remaining)
+        elif self.state == HALF_OPEN and self.probes >= settings.CIRCUIT_HALF_OPEN_PROBES:
+            raise CircuitOpenError(self.endpoint, self.account, 0.0)
+
+    def allow(self) -> bool:
+        """Admit a call or raise CircuitOpenError; True if it is a probe"""
+        if self.state == CLOSED:
+            return False
+        if self.state == OPEN:
+            remaining = self.opened_at + settings.CIRCUIT_OPEN_SECONDS - time.monotonic()
+            if remaining > 0:
+                raise CircuitOpenError(self.endpoint, self.account, remaining)
+            self._set_state(HALF_OPEN)
+            self.probes = 0
+            self.probe_successes = 0
+        if self.probes >= settings.CIRCUIT_HALF_OPEN_PROBES:
+            raise CircuitOpenError(self.endpoint, self.account, 0.0)
+        self.probes += 1
+        return True
+
+    def record(self, ok: bool, probe: bool = False):
+        if probe:
+            if self.state != HALF_OPEN:
+                return
+            if not ok:
+                self._open()
+                return
+            self.probe_successes += 1
+            if self.probe_successes >= settings.CIRCUIT_HALF_OPEN_PROBES:
+                self._close()
+            return
+
+        self._count(ok)
+        if self.state == CLOSED and not ok:
+            total = self._successes + self._failures
+            if total >= settings.CIRCUIT_MIN_REQUESTS and self._failures / total >= settings.CIRCUIT_FAILURE_RATE:
+                self._open()
+
+    def release(self, probe: bool):
+        """Give back a probe slot for a call that ended without an outcome"""
+        if probe and self.state == HALF_OPEN:
+            self.probes -= 1
+
+    def stats(self) -> dict:
+        total = self._successes + self._failures
+        return {
+            "state": self.state,
+            "requests": total,
+            "failure_rate": round(self._failures / total, 4) if total else 0.0
+        }
+
+    def _count(self, ok: bool):
+        second = int(time.monotonic())
+        horizon = second - settings.CIRCUIT_WINDOW_SECONDS
+        while self._window and self._window[0][0] <= horizon:
+            _, successes, failures = self._window.popleft()
+            self._successes -= successes
+            self._failures -= failures
+        if not self._window or self._window[-1][0] != second:
+            self._window.append((second, 0, 0))
+        bucket_second, successes, failures = self._window[-1]
+        if ok:
+            self._window[-1] = (bucket_second, successes + 1, failures)
+            self._successes += 1
+        else:
+            self._window[-1] = (bucket_second, successes, failures + 1)
+            self._failures += 1
+
+    def _open(self):
+        self.opened_at = time.monotonic()
+        self._set_state(OPEN)
+        logger.warning(f"Circuit opened for {self.endpoint} on {self.account}")
+
+    def _close(self):
+        self._window.clear()
+        self._successes = self._failures = 0
+        self._set_state(CLOSED)
+        logger.info(f"Circuit closed for {self.endpoint} on {self.account}")
+
+    def _set_state(self, state: str):
+        self.state = state
+        circuit_state.labels(endpoint=self.endpoint, account=self.account).set(_STATE_VALUES[state])
+
+@lru_cache(maxsize=1024)
+def endpoint_for_url(url: str) -> Tuple[str, str]:
+    """Split a Graph URL into (endpoint, account), ignoring the API version"""
+    segments = [segment for segment in urlsplit(url).path.split("/") if segment]
+    if segments and segments[0].startswith("v") and segments[0][1:].replace(".", "").isdigit():
+        segments = segments[1:]
+    account = segments[0] if segments else ""
+    endpoint = segments[1] if len(segments) > 1 else "node"
+    return endpoint, account
+
+class CircuitBreakers:
+    """Registry of breakers, one per (endpoint, account)"""
+
+    def __init__(self):
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+    def for_url(self, url: str) -> CircuitBreaker:
+        key = endpoint_for_url(url)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker(*key)
+        return breaker
+
+    def stats(self) -> dict:
+        return {f"{endpoint}:{account}": breaker.stats() for (endpoint, account), breaker in self._breakers.items()}
+
+circuit_breakers = CircuitBreakers()
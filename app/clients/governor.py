@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Graph API error codes that mean "slow down" rather than "this send is bad"
+RATE_LIMIT_CODES = frozenset({4, 17, 32, 613, 80007, 130429, 131048, 131056})
+
+def is_rate_limited(response: dict) -> bool:
+    error = response.get("error") if isinstance(response, dict) else None
+    return isinstance(error, dict) and error.get("code") in RATE_LIMIT_CODES
+
+class AdaptiveBucket:
+    """Token bucket whose rate follows AIMD.
+
+    Every successful send adds GOVERNOR_INCREASE_STEP to the rate; a
+    rate-limit error multiplies it by GOVERNOR_DECREASE_FACTOR, at most once
+    per GOVERNOR_DECREASE_COOLDOWN so one burst of throttled in-flight
+    sends only counts once.
+    """
+
+    def __init__(self, rate: float, burst: float, min_rate: float, max_rate: float):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.decreased_at = 0.0
+        self.throttled = 0
+
+    def reserve(self) -> float:
+        """Take a token and return how long to wait before using it"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # Tokens may go negative: waiters queue up behind each other in order
+        self.tokens -= 1
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + settings.GOVERNOR_INCREASE_STEP)
+
+    def on_throttle(self):
+        self.throttled += 1
+        now = time.monotonic()
+        if now - self.decreased_at < settings.GOVERNOR_DECREASE_COOLDOWN:
+            return
+        self.decreased_at = now
+        self.rate = max(self.min_rate, self.rate * settings.GOVERNOR_DECREASE_FACTOR)
+        # Drop any saved-up burst so the lower rate applies immediately
+        self.tokens = min(self.tokens, 0.0)
+        logger.warning(f"Graph API rate limit hit, outbound rate lowered to {self.rate:.2f}/s")
+
+class RateGovernor:
+    """Outbound send pacing shared by every Graph API client.
+
+    One adaptive bucket is kept per sender, e.g. a WhatsApp phone-number ID
+    or an Instagram account, so all send paths for that sender share it.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[str, AdaptiveBucket] = {}
+
+    def bucket(self, key: str) -> AdaptiveBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = AdaptiveBucket(
+                rate=settings.GOVERNOR_INITIAL_RATE,
+                burst=settings.GOVERNOR_BURST,
+                min_rate=settings.GOVERNOR_MIN_RATE,
+                max_rate=settings.GOVERNOR_MAX_RATE
+            )
+        return bucket
+
+    async def acquire(self, key: str):
+        delay = self.bucket(key).reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def record(self, key: str, response: Optional[dict]):
+        """Adapt the sender's rate to the outcome of a send"""
+        bucket = self.bucket(key)
+        if is_rate_limited(response):
+            bucket.on_throttle()
+        elif isinstance(response, dict) and "error" not in response:
+            bucket.on_success()
+
+    def stats(self) -> dict:
+        return {
+            key: {
+                "rate": round(bucket.rate, 2),
+                "tokens": round(bucket.tokens, 2),
+                "throttled": bucket.throttled
+            }
+            for key, bucket in self._buckets.items()
+        }
+
+governor = RateGovernor()
@@ -0,0 +1,118 @@
+import asyncio
+import importlib.util
+import logging
+import time
+from typing import Optional
+import httpx
+from app.core.config import settings
+from app.clients.breaker import circuit_breakers, endpoint_for_url
+from app.clients.governor import RATE_LIMIT_CODES
+from app.utils.metrics import graph_errors, graph_request_latency
+
+logger = logging.getLogger(__name__)
+
+def _outcome(endpoint: str, response: httpx.Response) -> str:
+    """Classify a response for the latency metric, counting Meta error codes"""
+    if response.status_code < 400:
+        return "success"
+    try:
+        code = response.json()["error"]["code"]
+    except (ValueError, KeyError, TypeError):
+        code = None
+    graph_errors.labels(endpoint, str(code) if code is not None else f"http_{response.status_code}").inc()
+    return "throttled" if code in RATE_LIMIT_CODES else "error"
+
+def graph_message_id(response: dict) -> Optional[str]:
+    """Message id of a send response: WhatsApp returns {"messages": [{"id": ...}]},
+    Instagram {"message_id": ...}"""
+    messages = response.get("messages")
+    if messages:
+        return messages[0].get("id")
+    return response.get("message_id")
+
+class GraphTransport:
+    """Shared async HTTP transport for all Graph API clients.
+
+    One pooled ``httpx.AsyncClient`` is reused for every request so TLS
+    connections are kept alive between sends instead of being reopened.
+    """
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._warmup: Optional[asyncio.Task] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    def _build_client(self) -> httpx.AsyncClient:
+        http2 = settings.GRAPH_HTTP2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed, using HTTP/1.1")
+            http2 = False
+
+        limits = httpx.Limits(
+            max_connections=settings.GRAPH_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.GRAPH_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.GRAPH_KEEPALIVE_EXPIRY
+        )
+        timeout = httpx.Timeout(settings.API_TIMEOUT, connect=min(settings.API_TIMEOUT, 10))
+        return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+
+    async def start(self):
+        """Open the pool and warm up a few connections to the Graph host.
+
+        The warm-up runs in the background so a slow or unreachable Graph host
+        does not hold up application startup.
+        """
+        client = self.client
+        warmup = max(settings.GRAPH_WARMUP_CONNECTIONS, 0)
+        if warmup and self._warmup is None:
+            self._warmup = asyncio.create_task(self._warm_up(client, warmup))
+
+    async def _warm_up(self, client: httpx.AsyncClient, warmup: int):
+        results = await asyncio.gather(
+            *(client.head(settings.GRAPH_API_BASE_URL) for _ in range(warmup)),
+            return_exceptions=True
+        )
+        failures = [r for r in results if isinstance(r, Exception)]
+        if failures:
+            logger.warning(f"Graph connection warm-up failed for {len(failures)}/{warmup} connections: {failures[0]}")
+        else:
+            logger.info(f"Warmed up {warmup} Graph API connections")
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request through the circuit breaker for its endpoint.
+
+        Transport errors and 5xx responses count as failures; while the
+        circuit is open CircuitOpenError is raised without any I/O.
+        """
+        breaker = circuit_breakers.for_url(url)
+        probe = breaker.allow()
+        endpoint = endpoint_for_url(url)[0]
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.TransportError:
+            breaker.record(False, probe)
+            graph_request_latency.labels(endpoint, "transport_error").observe(time.perf_counter() - start)
+            raise
+        except BaseException:
+            breaker.release(probe)
+            raise
+        breaker.record(response.status_code < 500, probe)
+        graph_request_latency.labels(endpoint, _outcome(endpoint, response)).observe(time.perf_counter() - start)
+        return response
+
+    async def close(self):
+        if self._warmup is not None:
+            self._warmup.cancel()
+            self._warmup = None
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            logger.info("Graph API transport closed")
+        self._client = None
+
+transport = GraphTransport()
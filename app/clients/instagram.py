@@ -1,24 +1,39 @@
 
-import requests
 from app.core.config import settings
+from app.clients.http import transport
+from app.clients.breaker import circuit_breakers
+from app.clients.governor import governor
 
 class InstagramClient:
     def __init__(self):
-        self.api_url = f"https://graph.facebook.com/v21.0/{settings.INSTAGRAM_ACCOUNT_ID}/messages"
+        self.api_url = f"{settings.GRAPH_API_BASE_URL}/{settings.INSTAGRAM_ACCOUNT_ID}/messages"
         self.headers = {
             "Authorization": f"Bearer {settings.INSTAGRAM_ACCESS_TOKEN}",
             "Content-Type": "application/json"
         }
+        self.governor_key = f"instagram:{settings.INSTAGRAM_ACCOUNT_ID}"
 
-    def send_message(self, recipient_id: str, message: str):
+    async def _request(self, method: str, url: str, payload: dict = None):
+        response = await transport.request(method, url, headers=self.headers, json=payload)
+        return response.json()
+
+    async def _send(self, payload: dict):
+        """POST a message, paced by the shared per-account rate governor"""
+        # Fail fast on an open circuit instead of waiting for a send slot
+        circuit_breakers.for_url(self.api_url).check()
+        await governor.acquire(self.governor_key)
+        response = await self._request("POST", self.api_url, payload)
+        governor.record(self.governor_key, response)
+        return response
+
+    async def send_message(self, recipient_id: str, message: str):
         payload = {
             "recipient": {"id": recipient_id},
             "message": {"text": message}
         }
-        response = requests.post(self.api_url, headers=self.headers, json=payload)
-        return response.json()
+        return await self._send(payload)
 
-    def send_media(self, recipient_id: str, media_url: str, media_type: str):
+    async def send_media(self, recipient_id: str, media_url: str, media_type: str):
         payload = {
             "recipient": {"id": recipient_id},
             "message": {
@@ -28,5 +43,4 @@ class InstagramClient:
                 }
             }
         }
-        response = requests.post(self.api_url, headers=self.headers, json=payload)
-        return response.json()
\ No newline at end of file
+        return await self._send(payload)
\ No newline at end of file
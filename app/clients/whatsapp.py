@@ -1,21 +1,58 @@
-import requests
+import json
+from typing import Optional
 from app.core.config import settings
+from app.clients.http import transport
+from app.clients.breaker import circuit_breakers
+from app.clients.governor import governor
 from app.models.templates import WhatsAppTemplate
-from circuitbreaker import circuit
-from app.utils.monitoring import monitor_request
 from app.models.messages import TemplateContent, MediaContent, Button
 
+class CompiledTemplate:
+    """A template payload encoded once, with a slot for the recipient.
+
+    Everything but ``to`` is invariant across a batch, so the JSON body is
+    split around the recipient and each send only encodes the phone number.
+    """
+
+    __slots__ = ("prefix", "suffix")
+
+    _SLOT = "\x00recipient\x00"
+
+    def __init__(self, payload: dict):
+        encoded = json.dumps({**payload, "to": self._SLOT}, separators=(",", ":"))
+        slot = json.dumps(self._SLOT)
+        prefix, suffix = encoded.split(slot)
+        self.prefix = prefix.encode()
+        self.suffix = suffix.encode()
+
+    def render(self, to_phone: str) -> bytes:
+        return b"".join((self.prefix, json.dumps(to_phone).encode(), self.suffix))
+
 class WhatsAppClient:
     def __init__(self):
-        self.api_url = f"https://graph.facebook.com/v21.0/{settings.WHATSAPP_PHONE_NUMBER_ID}/messages"
+        self.api_url = f"{settings.GRAPH_API_BASE_URL}/{settings.WHATSAPP_PHONE_NUMBER_ID}/messages"
         self.headers = {
             "Authorization": f"Bearer {settings.WHATSAPP_API_TOKEN}",
             "Content-Type": "application/json"
         }
-        self.base_url = f"https://graph.facebook.com/v21.0/{settings.WHATSAPP_PHONE_NUMBER_ID}"
+        self.base_url = f"{settings.GRAPH_API_BASE_URL}/{settings.WHATSAPP_PHONE_NUMBER_ID}"
+        self.governor_key = f"whatsapp:{settings.WHATSAPP_PHONE_NUMBER_ID}"
+
+    async def _request(self, method: str, url: str, payload: dict = None, params: dict = None, content: bytes = None):
+        response = await transport.request(
+            method, url, headers=self.headers, json=payload, params=params, content=content
+        )
+        return response.json()
+
+    async def _send(self, payload: dict = None, content: bytes = None):
+        """POST a message, paced by the shared per-number rate governor"""
+        # Fail fast on an open circuit instead of waiting for a send slot
+        circuit_breakers.for_url(self.api_url).check()
+        await governor.acquire(self.governor_key)
+        response = await self._request("POST", self.api_url, payload, content=content)
+        governor.record(self.governor_key, response)
+        return response
 
-    @circuit(failure_threshold=5, recovery_timeout=60)
-    @monitor_request(counter_metric='whatsapp_requests', latency_metric='whatsapp_latency')
     async def send_message(self, to_phone: str, message: str):
         payload = {
             "messaging_product": "whatsapp",
@@ -25,10 +62,9 @@ class WhatsAppClient:
             "text": {"body": message}
         }
         
-        response = requests.post(self.api_url, headers=self.headers, json=payload)
-        return response.json()
+        return await self._send(payload)
 
-    def send_template(self, to_phone: str, template_name: str, language_code: str = "en_US"):
+    async def send_template(self, to_phone: str, template_name: str, language_code: str = "en_US"):
         payload = {
             "messaging_product": "whatsapp",
             "to": to_phone,
@@ -41,39 +77,51 @@ class WhatsAppClient:
             }
         }
         
-        response = requests.post(self.api_url, headers=self.headers, json=payload)
-        return response.json()
+        return await self._send(payload)
 
-    def create_template(self, template: WhatsAppTemplate):
-        url = f"https://graph.facebook.com/v21.0/{settings.WHATSAPP_BUSINESS_ID}/message_templates"
+    async def create_template(self, template: WhatsAppTemplate):
+        url = f"{settings.GRAPH_API_BASE_URL}/{settings.WHATSAPP_BUSINESS_ID}/message_templates"
         payload = {
             "name": template.name,
             "language": template.language_code,
             "category": template.category,
             "components": [comp.dict() for comp in template.components]
         }
-        response = requests.post(url, headers=self.headers, json=payload)
-        return response.json()
+        return await self._request("POST", url, payload)
 
-    def get_templates(self):
-        url = f"https://graph.facebook.com/v21.0/{settings.WHATSAPP_BUSINESS_ID}/message_templates"
-        response = requests.get(url, headers=self.headers)
-        return response.json()
+    async def get_templates(self, after: str = None, limit: int = None):
+        url = f"{settings.GRAPH_API_BASE_URL}/{settings.WHATSAPP_BUSINESS_ID}/message_templates"
+        params = {}
+        if after:
+            params["after"] = after
+        if limit:
+            params["limit"] = limit
+        return await self._request("GET", url, params=params or None)
 
-    def delete_template(self, template_name: str):
-        url = f"https://graph.facebook.com/v21.0/{settings.WHATSAPP_BUSINESS_ID}/message_templates"
-        payload = {"name": template_name}
-        response = requests.delete(url, headers=self.headers, json=payload)
-        return response.json()
+    async def get_all_templates(self, page_size: int = 100):
+        """Fetch every template page, following the Graph paging cursors"""
+        templates = []
+        after = None
+        while True:
+            response = await self.get_templates(after=after, limit=page_size)
+            if "error" in response:
+                return response
+            templates.extend(response.get("data", []))
+            paging = response.get("paging", {})
+            after = paging.get("cursors", {}).get("after")
+            if not paging.get("next") or not after:
+                return {"data": templates}
+
+    async def delete_template(self, template_name: str):
+        url = f"{settings.GRAPH_API_BASE_URL}/{settings.WHATSAPP_BUSINESS_ID}/message_templates"
+        params = {"name": template_name}
+        return await self._request("DELETE", url, params=params)
 
-    def get_message_status(self, message_id: str):
+    async def get_message_status(self, message_id: str):
         url = f"{self.base_url}/messages/{message_id}"
-        response = requests.get(url, headers=self.headers)
-        return response.json()
+        return await self._request("GET", url)
 
-    @circuit(failure_threshold=5, recovery_timeout=60)
-    @monitor_request(counter_metric='whatsapp_requests', latency_metric='whatsapp_latency')
-    def send_media(self, to_phone: str, media_url: str, media_type: str):
+    async def send_media(self, to_phone: str, media_url: str, media_type: str):
         payload = {
             "messaging_product": "whatsapp",
             "recipient_type": "individual",
@@ -82,22 +130,31 @@ class WhatsAppClient:
             media_type: {"link": media_url}
         }
         
-        response = requests.post(self.api_url, headers=self.headers, json=payload)
-        return response.json()
+        return await self._send(payload)
 
-    def mark_as_read(self, message_id: str):
+    async def mark_as_read(self, message_id: str):
         payload = {
             "messaging_product": "whatsapp",
             "status": "read",
             "message_id": message_id
         }
-        response = requests.post(f"{self.base_url}/messages", headers=self.headers, json=payload)
-        return response.json()
+        return await self._request("POST", f"{self.base_url}/messages", payload)
 
-    def send_template_with_content(self, to_phone: str, template_name: str, content: TemplateContent, language_code: str = "en"):
+    async def send_template_with_content(self, to_phone: str, template_name: str, content: TemplateContent, language_code: str = "en"):
+        payload = self._template_payload(template_name, content, language_code)
+        payload["to"] = to_phone
+        return await self._send(payload)
+
+    def compile_template(self, template_name: str, content: Optional[TemplateContent], language_code: str = "en") -> CompiledTemplate:
+        """Build and encode a template payload once for sending to many recipients"""
+        return CompiledTemplate(self._template_payload(template_name, content, language_code))
+
+    async def send_compiled_template(self, to_phone: str, compiled: CompiledTemplate):
+        return await self._send(content=compiled.render(to_phone))
+
+    def _template_payload(self, template_name: str, content: Optional[TemplateContent], language_code: str) -> dict:
         payload = {
             "messaging_product": "whatsapp",
-            "to": to_phone,
             "type": "template",
             "template": {
                 "name": template_name,
@@ -105,6 +162,8 @@ class WhatsAppClient:
                 "components": []
             }
         }
+        if content is None:
+            return payload
 
         # Add header if present
         if content.header:
@@ -113,7 +172,7 @@ class WhatsAppClient:
                     "type": "header",
                     "parameters": [{
                         "type": content.header.type,
-                        "url": content.header.url
+                        "url": str(content.header.url)
                     }]
                 })
             else:
@@ -145,5 +204,4 @@ class WhatsAppClient:
                     })
             payload["template"]["components"].append(button_component)
 
-        response = requests.post(self.api_url, headers=self.headers, json=payload)
-        return response.json()
+        return payload
@@ -8,11 +8,17 @@ class Settings(BaseSettings):
     WHATSAPP_PHONE_NUMBER_ID: str = "development_id"
     WHATSAPP_BUSINESS_ID: str = "development_business_id"
     WEBHOOK_VERIFY_TOKEN: str = "development_webhook_token"
+    WHATSAPP_APP_SECRET: str = "development_app_secret"  # signs webhook payloads (X-Hub-Signature-256)
     DATABASE_URL: str = os.path.join(
         os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
         'data',
         'messages.db'
     )
+    SCHEDULER_DATABASE_PATH: str = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+        'data',
+        'scheduler.db'
+    )
     INSTAGRAM_ACCESS_TOKEN: str = "development_instagram_token"
     INSTAGRAM_ACCOUNT_ID: str = "development_instagram_id"
 
@@ -32,16 +38,105 @@ class Settings(BaseSettings):
     
     # Database
     DB_MAX_CONNECTIONS: int = 100
-    DB_MIN_CONNECTIONS: int = 20
+    DB_MIN_CONNECTIONS: int = 20  # read pool; writes use one dedicated connection
     DB_CONNECTION_TIMEOUT: int = 5000
+    DB_CACHE_SIZE_KB: int = 65536
+    DB_MMAP_SIZE: int = 268435456
+    DB_WRITE_BATCH_SIZE: int = 500
+    DB_WRITE_FLUSH_INTERVAL_MS: int = 20
+    DB_WRITE_QUEUE_SIZE: int = 10000
+    DB_WRITE_RETRIES: int = 5  # for 'database is locked' while other workers write
+    DB_WRITE_RETRY_BACKOFF_MS: int = 25
+    STATUS_FLUSH_INTERVAL_MS: int = 200
+    STATUS_BATCH_SIZE: int = 5000
+    DB_CONTENT_CODEC: str = "msgpack"  # msgpack or json; legacy JSON text rows stay readable
+    DB_CONTENT_COMPRESS_THRESHOLD: int = 1024  # zlib-compress encoded content above this many bytes
     
+    # Scheduler
+    SCHEDULER_POLL_INTERVAL: int = 30
+    SCHEDULER_DUE_BATCH_SIZE: int = 500
+    SCHEDULER_DB_BUSY_TIMEOUT: float = 0.25  # seconds to wait on a locked job store
+    SCHEDULER_MISFIRE_GRACE_SECONDS: Optional[int] = 3600
+
+    # Process model
+    WORKERS: int = 1
+    LEADER_LEASE_SECONDS: float = 15.0
+    LEADER_RENEW_INTERVAL: float = 5.0
+
     # API Timeouts
     API_TIMEOUT: int = 30
+
+    # Graph API HTTP transport
+    GRAPH_API_BASE_URL: str = "https://graph.facebook.com/v21.0"  # point at a stand-in for load tests
+    GRAPH_MAX_CONNECTIONS: int = 100
+    GRAPH_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    GRAPH_KEEPALIVE_EXPIRY: float = 60.0
+    GRAPH_HTTP2: bool = True
+    GRAPH_WARMUP_CONNECTIONS: int = 4
+
+    # Graph API circuit breakers
+    CIRCUIT_WINDOW_SECONDS: int = 30
+    CIRCUIT_MIN_REQUESTS: int = 20
+    CIRCUIT_FAILURE_RATE: float = 0.5
+    CIRCUIT_OPEN_SECONDS: float = 30.0
+    CIRCUIT_HALF_OPEN_PROBES: int = 3
+
+    # Outbound rate governor (messages per second per sender)
+    GOVERNOR_INITIAL_RATE: float = 20.0
+    GOVERNOR_MIN_RATE: float = 1.0
+    GOVERNOR_MAX_RATE: float = 80.0
+    GOVERNOR_BURST: float = 20.0
+    GOVERNOR_INCREASE_STEP: float = 0.5
+    GOVERNOR_DECREASE_FACTOR: float = 0.5
+    GOVERNOR_DECREASE_COOLDOWN: float = 1.0
+
+    # Batch dispatch
+    BATCH_CONCURRENCY: int = 50
+    BATCH_QUEUE_SIZE: int = 1000
+    CSV_CHUNK_SIZE: int = 65536
+
+    # Webhook ingestion
+    WEBHOOK_QUEUE_SIZE: int = 10000
+    WEBHOOK_CONSUMERS: int = 2
+    WEBHOOK_BATCH_SIZE: int = 200
+    WEBHOOK_DEDUP_MAX_ENTRIES: int = 200000
+    WEBHOOK_DEDUP_TTL_SECONDS: int = 3600
+    WEBHOOK_DEDUP_PERSISTENT: bool = False  # also check a SQLite seen-set for older redeliveries
+    WEBHOOK_DEDUP_RETENTION_HOURS: int = 72
+
+    # Outbox delivery
+    OUTBOX_MODE: bool = False  # when on, single sends return 202 with an outbox_id and are delivered in the background
+    OUTBOX_WORKERS: int = 20
+    OUTBOX_CLAIM_BATCH: int = 100
+    OUTBOX_POLL_INTERVAL_MS: int = 500
+    OUTBOX_LEASE_SECONDS: int = 60
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_BACKOFF_BASE_SECONDS: float = 2.0
+    OUTBOX_BACKOFF_MAX_SECONDS: float = 600.0
+    OUTBOX_RETENTION_HOURS: int = 72
+
+    # Template catalog cache
+    TEMPLATE_CACHE_TTL: int = 300
+
+    # Scheduled campaigns
+    CAMPAIGN_PAGE_SIZE: int = 5000
+    CAMPAIGN_MAX_RATE: Optional[float] = None  # messages per second, None = unpaced
+    CAMPAIGN_PROGRESS_INTERVAL: int = 5
+    CAMPAIGN_STALE_SECONDS: int = 60  # a running campaign without a heartbeat this long is resumed
+    CAMPAIGN_WATCHDOG_INTERVAL: int = 30
+
+    # Phone number validation
+    PHONE_VALIDATION_CACHE_SIZE: int = 100000
+    PHONE_VALIDATION_PROCESS_THRESHOLD: int = 50000
+    PHONE_VALIDATION_CHUNK_SIZE: int = 10000
+    PHONE_VALIDATION_PROCESSES: Optional[int] = None  # None = one per CPU
     
     # JWT Settings
     JWT_SECRET_KEY: str = "development_jwt_key"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    AUTH_TOKEN_CACHE_TTL: int = 300  # seconds; also bounds caching of tokens without exp
 
     @property
     def is_production(self):
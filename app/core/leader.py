@@ -0,0 +1,74 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from typing import Callable, Optional
+from app.core.config import settings
+from app.utils.db import acquire_lease, release_lease
+
+logger = logging.getLogger(__name__)
+
+class LeaderElection:
+    """Elects one process among the workers sharing the database.
+
+    Each process tries to take or renew a named lease every
+    LEADER_RENEW_INTERVAL seconds. The lease lasts LEADER_LEASE_SECONDS, so
+    if the leader dies another worker takes over within that time.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        on_elected: Callable[[], None],
+        on_demoted: Callable[[], None]
+    ):
+        self.name = name
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.is_leader = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            await self._renew()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Step down and release the lease so another worker can take over"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self.is_leader:
+            self._set_leader(False)
+            await release_lease(self.name, self.holder)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.LEADER_RENEW_INTERVAL)
+            await self._renew()
+
+    async def _renew(self):
+        try:
+            leader = await acquire_lease(self.name, self.holder, settings.LEADER_LEASE_SECONDS)
+        except Exception as e:
+            # Without a confirmed lease assume someone else may hold it
+            logger.error(f"Failed to renew {self.name} lease: {e}")
+            leader = False
+        if leader != self.is_leader:
+            self._set_leader(leader)
+
+    def _set_leader(self, leader: bool):
+        self.is_leader = leader
+        if leader:
+            logger.info(f"{self.holder} elected {self.name} leader")
+            self.on_elected()
+        else:
+            logger.info(f"{self.holder} is no longer {self.name} leader")
+            self.on_demoted()
@@ -1,52 +1,214 @@
+import asyncio
+import logging
+import os
+import time
 from datetime import datetime
-from apscheduler.schedulers.background import BackgroundScheduler
+from typing import Optional
+from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_MISSED
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.date import DateTrigger
+from app.core.config import settings
 from app.clients.whatsapp import WhatsAppClient
 from app.clients.instagram import InstagramClient
+from app.utils.metrics import scheduler_jobs
+
+logger = logging.getLogger(__name__)
+
+class _PollingAsyncIOScheduler(AsyncIOScheduler):
+    """Wakes up at least every SCHEDULER_POLL_INTERVAL seconds so jobs added
+    to the store from elsewhere are picked up without loading them early."""
+
+    def _start_timer(self, wait_seconds):
+        poll = settings.SCHEDULER_POLL_INTERVAL
+        wait_seconds = poll if wait_seconds is None else min(wait_seconds, poll)
+        super()._start_timer(wait_seconds)
+
+# Jobs are persisted by reference, so they must be importable module-level
+# callables rather than bound methods of a client instance.
+
+async def send_whatsapp_message(recipient: str, message: str):
+    return await scheduler.whatsapp_client.send_message(recipient, message)
+
+async def send_whatsapp_template(phone: str, template_name: str, language_code: str):
+    return await scheduler.whatsapp_client.send_template(phone, template_name, language_code)
+
+async def send_instagram_message(recipient_id: str, message: str):
+    return await scheduler.instagram.send_message(recipient_id, message)
+
+async def send_instagram_media(recipient_id: str, media_url: str, media_type: str):
+    return await scheduler.instagram.send_media(recipient_id, media_url, media_type)
+
+class SchedulerBusyError(Exception):
+    """Raised when the job store stays locked by another worker"""
 
 class MessageScheduler:
     def __init__(self):
-        self.scheduler = BackgroundScheduler()
-        self.scheduler.start()
+        # Built in start() so importing this module has no side effects
+        self.jobstore = None
+        self.scheduler = None
+        self.whatsapp_client = None
+        self.instagram = None
+        # Refreshed off the event loop by _refresh_job_counts; /metrics reads these
+        self.job_counts = {"stored": 0, "overdue": 0}
+        self._counter: Optional[asyncio.Task] = None
+
+    def _build(self):
+        # The job store pulls in SQLAlchemy, so it is only imported here
+        from app.core.jobstore import SQLiteJobStore
+
+        # Client methods are coroutines, so jobs run on the application event
+        # loop and share its pooled Graph transport. Jobs are stored in SQLite
+        # and survive restarts.
+        self.jobstore = SQLiteJobStore(f"sqlite:///{settings.SCHEDULER_DATABASE_PATH}")
+        self.scheduler = _PollingAsyncIOScheduler(
+            # The campaign watchdog is re-added on every start, so it stays in memory
+            jobstores={"default": self.jobstore, "memory": MemoryJobStore()},
+            job_defaults={
+                # Late jobs within the grace period still run (None = always
+                # catch up); repeated misfires of one job collapse into one run.
+                "misfire_grace_time": settings.SCHEDULER_MISFIRE_GRACE_SECONDS,
+                "coalesce": True,
+                "max_instances": 1
+            },
+            timezone="UTC"
+        )
+        self.scheduler.add_listener(self._on_job_missed, EVENT_JOB_MISSED)
+        self.scheduler.add_listener(self._on_job_error, EVENT_JOB_ERROR)
+        self.scheduler.add_job(
+            "app.services.campaigns:resume_stalled_campaigns",
+            'interval',
+            seconds=settings.CAMPAIGN_WATCHDOG_INTERVAL,
+            id="campaign-watchdog",
+            jobstore="memory"
+        )
         self.whatsapp_client = WhatsAppClient()
         self.instagram = InstagramClient()
 
-    def schedule_message(self, recipient: str, message: str, scheduled_time):
-        job = self.scheduler.add_job(
-            self.whatsapp_client.send_message,
+    def start(self, paused: bool = False):
+        """Start the scheduler; a paused scheduler stores jobs but runs none"""
+        if self.scheduler is None:
+            os.makedirs(os.path.dirname(settings.SCHEDULER_DATABASE_PATH), exist_ok=True)
+            self._build()
+        if not self.scheduler.running:
+            self.scheduler.start(paused=paused)
+            logger.info(f"Scheduler started{' paused' if paused else ''} with {self.jobstore.count_jobs()} stored jobs")
+        if self._counter is None:
+            self._counter = asyncio.create_task(self._refresh_job_counts())
+
+    def resume(self):
+        """Begin running due jobs (this process holds the scheduler role)"""
+        if self.scheduler is not None and self.scheduler.running:
+            self.scheduler.resume()
+
+    def pause(self):
+        if self.scheduler is not None and self.scheduler.running:
+            self.scheduler.pause()
+
+    def shutdown(self):
+        if self._counter is not None:
+            self._counter.cancel()
+            self._counter = None
+        if self.scheduler is not None and self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+
+    def _on_job_missed(self, event):
+        logger.warning(
+            f"Scheduled job {event.job_id} missed its run time {event.scheduled_run_time} "
+            f"by more than {settings.SCHEDULER_MISFIRE_GRACE_SECONDS}s and was skipped"
+        )
+
+    def _on_job_error(self, event):
+        logger.error(f"Scheduled job {event.job_id} failed: {event.exception}")
+
+    async def schedule_message(self, recipient: str, message: str, scheduled_time):
+        job = await self._call(
+            self.scheduler.add_job,
+            send_whatsapp_message,
             trigger=DateTrigger(run_date=scheduled_time),
             args=[recipient, message]
         )
         return job.id
 
-    def schedule_template(self, phone: str, template_name: str, language_code: str, send_time: datetime):
-        job = self.scheduler.add_job(
-            self.whatsapp.send_template,
+    async def schedule_template(self, phone: str, template_name: str, language_code: str, send_time: datetime):
+        job = await self._call(
+            self.scheduler.add_job,
+            send_whatsapp_template,
             'date',
             run_date=send_time,
             args=[phone, template_name, language_code]
         )
         return job.id
 
-    def schedule_instagram_message(self, recipient_id: str, message: str, send_time: datetime):
-        job = self.scheduler.add_job(
-            self.instagram.send_message,
+    async def schedule_instagram_message(self, recipient_id: str, message: str, send_time: datetime):
+        job = await self._call(
+            self.scheduler.add_job,
+            send_instagram_message,
             'date',
             run_date=send_time,
             args=[recipient_id, message]
         )
         return job.id
 
-    def schedule_instagram_media(self, recipient_id: str, media_url: str, media_type: str, send_time: datetime):
-        job = self.scheduler.add_job(
-            self.instagram.send_media,
+    async def schedule_instagram_media(self, recipient_id: str, media_url: str, media_type: str, send_time: datetime):
+        job = await self._call(
+            self.scheduler.add_job,
+            send_instagram_media,
             'date',
             run_date=send_time,
             args=[recipient_id, media_url, media_type]
         )
         return job.id
 
-    def cancel_message(self, job_id: str):
-        self.scheduler.remove_job(job_id)
+    async def schedule_campaign(self, campaign_id: str, send_time: datetime):
+        # Referenced by name: the campaign service imports this module
+        job = await self._call(
+            self.scheduler.add_job,
+            "app.services.campaigns:run_campaign",
+            'date',
+            run_date=send_time,
+            args=[campaign_id],
+            id=f"campaign-{campaign_id}",
+            # A stalled campaign is rescheduled under its original id
+            replace_existing=True
+        )
+        return job.id
+
+    async def cancel_message(self, job_id: str) -> bool:
+        try:
+            await self._call(self.scheduler.remove_job, job_id)
+            return True
+        except JobLookupError:
+            return False
+
+    async def _call(self, func, *args, **kwargs):
+        """Run a blocking job-store call off the event loop"""
+        from sqlalchemy.exc import OperationalError
+        try:
+            return await asyncio.to_thread(func, *args, **kwargs)
+        except OperationalError as e:
+            raise SchedulerBusyError(f"Scheduler job store is busy: {e.orig}") from e
+
+    def _count_jobs(self) -> dict:
+        return {
+            "stored": self.jobstore.count_jobs(),
+            # A growing overdue count means no worker is running the jobs
+            "overdue": self.jobstore.count_due_jobs(time.time())
+        }
+
+    async def _refresh_job_counts(self):
+        """Recount stored and overdue jobs every SCHEDULER_POLL_INTERVAL seconds"""
+        from sqlalchemy.exc import OperationalError
+        while True:
+            try:
+                self.job_counts = await asyncio.to_thread(self._count_jobs)
+            except OperationalError as e:
+                # Locked by another worker; keep the last counts
+                logger.debug(f"Could not count scheduler jobs: {e.orig}")
+            await asyncio.sleep(settings.SCHEDULER_POLL_INTERVAL)
+
+scheduler = MessageScheduler()
 
-scheduler = MessageScheduler()
\ No newline at end of file
+scheduler_jobs.labels("stored").set_function(lambda: scheduler.job_counts["stored"])
+scheduler_jobs.labels("overdue").set_function(lambda: scheduler.job_counts["overdue"])
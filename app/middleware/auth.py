@@ -1,42 +1,162 @@
-from fastapi import Request, HTTPException
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+import hashlib
+import hmac
 import jwt
 from app.core.config import settings
 import time
 
-security = HTTPBearer()
-
+# Paths that are public only as written
 PUBLIC_PATHS = [
+    "/",
     "/health",
+    "/metrics",
+    "/openapi.json",
+    # Called by Meta, which cannot present our JWT
+    "/api/whatsapp/webhook"
+]
+
+# Paths that are public together with everything beneath them
+PUBLIC_PREFIXES = [
     "/docs",
     "/redoc",
-    "/openapi.json",
-    "/static",
-    "/"  # Root path
+    "/static"
 ]
 
+class PathMatcher:
+    """Exact-path set plus a segment trie of public prefixes.
+
+    Prefixes match whole segments only, so "/static" covers "/static/app.js"
+    but not "/staticfiles".
+    """
+
+    _END = object()
+
+    def __init__(self, exact: Iterable[str], prefixes: Iterable[str]):
+        self.exact = frozenset(path.rstrip("/") or "/" for path in exact)
+        self.trie: Dict = {}
+        for prefix in prefixes:
+            node = self.trie
+            for segment in prefix.strip("/").split("/"):
+                node = node.setdefault(segment, {})
+            node[self._END] = True
+
+    def matches(self, path: str) -> bool:
+        if (path.rstrip("/") or "/") in self.exact:
+            return True
+        node = self.trie
+        for segment in path.strip("/").split("/"):
+            node = node.get(segment)
+            if node is None:
+                return False
+            if self._END in node:
+                return True
+        return False
+
+public_paths = PathMatcher(PUBLIC_PATHS, PUBLIC_PREFIXES)
+
+class TokenCache:
+    """Bounded LRU of verified token claims keyed by token digest.
+
+    Entries are dropped after AUTH_TOKEN_CACHE_TTL seconds, or earlier once
+    the token's ``exp`` passes, so a cached token never outlives its own
+    validity. Tokens without ``exp`` (long-lived service tokens) are
+    re-verified once the TTL runs out.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, Tuple[dict, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, key: bytes) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        claims, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return claims
+
+    def put(self, key: bytes, claims: dict):
+        expires_at = time.time() + settings.AUTH_TOKEN_CACHE_TTL
+        if "exp" in claims:
+            expires_at = min(expires_at, float(claims["exp"]))
+        self._entries[key] = (claims, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+token_cache = TokenCache(settings.AUTH_TOKEN_CACHE_SIZE)
+
 def verify_jwt(token: str) -> dict:
+    key = TokenCache.key(token)
+    claims = token_cache.get(key)
+    if claims is not None:
+        return claims
     try:
-        decoded_token = jwt.decode(
-            token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
+        claims = jwt.decode(
+            token,
+            settings.JWT_SECRET_KEY,
+            algorithms=[settings.JWT_ALGORITHM]
         )
-        if decoded_token["exp"] < time.time():
-            raise HTTPException(status_code=401, detail="Token has expired")
-        return decoded_token
-    except jwt.JWTError:
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token has expired")
+    except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    token_cache.put(key, claims)
+    return claims
 
-async def auth_middleware(request: Request, call_next):
-    try:
-        # Skip authentication for public paths
-        path = request.url.path
-        if any(path.startswith(public_path) for public_path in PUBLIC_PATHS):
-            return await call_next(request)
-
-        # Proceed with authentication for protected paths
-        token = await security(request)
-        verify_jwt(token.credentials)
-        response = await call_next(request)
-        return response
-    except HTTPException as e:
-        raise e
\ No newline at end of file
+def verify_webhook_signature(body: bytes, signature: Optional[str]) -> bool:
+    """Check Meta's X-Hub-Signature-256 header against the raw payload"""
+    if not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(settings.WHATSAPP_APP_SECRET.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature[len("sha256="):])
+
+def _bearer_token(scope) -> str:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, credentials = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and credentials:
+                return credentials
+            break
+    raise HTTPException(status_code=401, detail="Not authenticated")
+
+class AuthMiddleware:
+    """Pure ASGI JWT authentication for every non-public HTTP path"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or public_paths.matches(scope["path"]):
+            return await self.app(scope, receive, send)
+
+        try:
+            claims = verify_jwt(_bearer_token(scope))
+        except HTTPException as e:
+            response = JSONResponse(
+                status_code=e.status_code,
+                content={"detail": e.detail},
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+            return await response(scope, receive, send)
+        # Exposed to handlers as request.state.claims
+        scope.setdefault("state", {})["claims"] = claims
+        await self.app(scope, receive, send)
@@ -0,0 +1,27 @@
+from fastapi.responses import JSONResponse
+
+BODY_METHODS = frozenset({"POST", "PUT", "PATCH"})
+
+# JSON for API calls, multipart or raw CSV for batch uploads
+ALLOWED_CONTENT_TYPES = ("application/json", "multipart/form-data", "text/csv")
+
+class ContentTypeMiddleware:
+    """Rejects request bodies that are not JSON, multipart or CSV uploads"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] in BODY_METHODS:
+            content_type = b""
+            for name, value in scope["headers"]:
+                if name == b"content-type":
+                    content_type = value
+                    break
+            if not content_type.decode("latin-1").lower().startswith(ALLOWED_CONTENT_TYPES):
+                response = JSONResponse(
+                    status_code=400,
+                    content={"detail": "Content-Type must be application/json, multipart/form-data or text/csv"}
+                )
+                return await response(scope, receive, send)
+        await self.app(scope, receive, send)
@@ -0,0 +1,28 @@
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+SLOW_REQUEST_SECONDS = 1.0
+
+class TimingMiddleware:
+    """Adds an X-Process-Time header and logs slow requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                elapsed = time.perf_counter() - start
+                message["headers"] = [*message.get("headers", []), (b"x-process-time", f"{elapsed:.6f}".encode())]
+                if elapsed > SLOW_REQUEST_SECONDS:
+                    logger.warning(f"Slow request {scope['method']} {scope['path']} took {elapsed:.3f}s")
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
@@ -1,4 +1,4 @@
-from typing import List, Optional, Union
+from typing import Any, List, Optional, Union
 from pydantic import BaseModel, HttpUrl
 from datetime import datetime
 
@@ -22,7 +22,8 @@ class BatchMessage(BaseModel):
     template_name: str
     language_code: str = "en"
     recipients: List[str]
-    content: TemplateContent
+    # None sends the template without parameters
+    content: Optional[TemplateContent] = None
     scheduled_time: Optional[datetime] = None
 
 class ScheduledMessage(BaseModel):
@@ -34,4 +35,31 @@ class ScheduledMessage(BaseModel):
 class MessageResponse(BaseModel):
     from_number: str
     message: str
-    timestamp: datetime
\ No newline at end of file
+    timestamp: datetime
+
+# Read models; declaring them lets FastAPI serialize rows straight to JSON bytes
+
+class StoredMessage(BaseModel):
+    message_id: str
+    content: Any
+    created_at: Optional[str] = None
+    status: Optional[str] = None
+
+class MessageRecord(StoredMessage):
+    recipient: str
+    updated_at: Optional[str] = None
+    platform: Optional[str] = None
+    direction: Optional[str] = None
+    template_name: Optional[str] = None
+    message_type: Optional[str] = None
+
+class InboundMessage(BaseModel):
+    message_id: str
+    contact: str
+    phone_number_id: Optional[str] = None
+    contact_name: Optional[str] = None
+    message_type: Optional[str] = None
+    body: Optional[str] = None
+    payload: Any
+    timestamp: int
+    received_at: Optional[str] = None
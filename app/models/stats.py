@@ -0,0 +1,21 @@
+from typing import Dict, List
+from pydantic import BaseModel
+from app.models.messages import MessageRecord
+
+class DashboardStats(BaseModel):
+    total_messages: int
+    whatsapp_messages: int
+    instagram_messages: int
+    status_counts: Dict[str, int]
+    recent_messages: List[MessageRecord]
+
+class TimeseriesPoint(BaseModel):
+    bucket: str
+    total: int
+    statuses: Dict[str, int]
+    delivered: int
+    delivery_rate: float
+
+class Timeseries(BaseModel):
+    granularity: str
+    series: List[TimeseriesPoint]
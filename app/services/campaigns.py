@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional, Set
+from app.core.config import settings
+from app.core.scheduler import scheduler
+from app.models.messages import BatchMessage, TemplateContent
+from app.services.dispatcher import BatchDispatcher
+from app.services.whatsapp import WhatsAppService
+from app.utils.db import (
+    claim_stalled_campaigns, create_campaign, finish_campaign, get_campaign,
+    iter_campaign_recipients, update_campaign
+)
+from app.utils.phone_validator import validate_phone_numbers
+
+logger = logging.getLogger(__name__)
+
+async def schedule_campaign(batch_msg: BatchMessage) -> dict:
+    """Store a scheduled batch as one campaign and one scheduler job"""
+    validated = await asyncio.to_thread(validate_phone_numbers, batch_msg.recipients)
+    recipients = list(dict.fromkeys(formatted for is_valid, formatted in validated if is_valid))
+    campaign_id = str(uuid.uuid4())
+
+    await create_campaign({
+        "campaign_id": campaign_id,
+        "template_name": batch_msg.template_name,
+        "language_code": batch_msg.language_code,
+        "content": batch_msg.content.dict() if batch_msg.content else None,
+        "scheduled_time": batch_msg.scheduled_time
+    }, recipients)
+    job_id = await scheduler.schedule_campaign(campaign_id, batch_msg.scheduled_time)
+    await update_campaign(campaign_id, job_id=job_id)
+
+    logger.info(f"Scheduled campaign {campaign_id} for {len(recipients)} recipients at {batch_msg.scheduled_time}")
+    return {
+        "campaign_id": campaign_id,
+        "job_id": job_id,
+        "total": len(recipients),
+        "invalid": len(batch_msg.recipients) - len(recipients)
+    }
+
+async def cancel_campaign(campaign_id: str) -> bool:
+    campaign = await get_campaign(campaign_id)
+    if campaign is None or campaign["status"] in ("completed", "cancelled"):
+        return False
+    if campaign["job_id"]:
+        await scheduler.cancel_message(campaign["job_id"])
+    # A running campaign notices the status change at its next progress check
+    await update_campaign(campaign_id, status="cancelled")
+    return True
+
+async def run_campaign(campaign_id: str):
+    """Scheduler job: fan a stored campaign out to all of its recipients.
+
+    Progress is checkpointed as the position below which every recipient has
+    been handled, so a campaign taken over after its runner died resumes from
+    there; recipients in flight at the time may be sent twice.
+    """
+    campaign = await get_campaign(campaign_id)
+    if campaign is None or campaign["status"] not in ("scheduled", "running"):
+        logger.warning(f"Campaign {campaign_id} is not runnable, skipping")
+        return
+    resumed = campaign["status"] == "running"
+
+    batch_msg = BatchMessage(
+        template_name=campaign["template_name"],
+        language_code=campaign["language_code"],
+        recipients=[],
+        content=TemplateContent(**campaign["content"]) if campaign["content"] else None
+    )
+    service = WhatsAppService()
+    compiled = service.compile_batch(batch_msg)
+    dispatcher = BatchDispatcher(rate=settings.CAMPAIGN_MAX_RATE, kind="campaign")
+    if resumed:
+        await update_campaign(campaign_id, heartbeat_at=time.time())
+        logger.info(f"Resuming campaign {campaign_id} after position {campaign['checkpoint']}")
+    else:
+        await update_campaign(campaign_id, status="running", started_at=datetime.utcnow(), heartbeat_at=time.time())
+    cancelled = asyncio.Event()
+    # Positions handed to the dispatcher whose send has not finished yet
+    pending: Set[int] = set()
+    last_position = campaign["checkpoint"]
+
+    def checkpoint() -> int:
+        return min(pending) - 1 if pending else last_position
+
+    def sent() -> int:
+        return campaign["sent"] + dispatcher.stats.sent
+
+    def failed() -> int:
+        return campaign["failed"] + dispatcher.stats.failed
+
+    async def recipients():
+        nonlocal last_position
+        async for position, recipient in iter_campaign_recipients(campaign_id, after=campaign["checkpoint"]):
+            if cancelled.is_set():
+                return
+            pending.add(position)
+            last_position = position
+            yield position, recipient
+
+    async def send(item):
+        position, recipient = item
+        try:
+            return await service.send_batch_recipient(compiled, recipient)
+        finally:
+            pending.discard(position)
+
+    async def record_progress():
+        while True:
+            await asyncio.sleep(settings.CAMPAIGN_PROGRESS_INTERVAL)
+            await update_campaign(
+                campaign_id,
+                sent=sent(),
+                failed=failed(),
+                checkpoint=checkpoint(),
+                heartbeat_at=time.time()
+            )
+            current = await get_campaign(campaign_id)
+            if current and current["status"] == "cancelled":
+                cancelled.set()
+
+    progress = asyncio.create_task(record_progress())
+    status = "completed"
+    try:
+        await dispatcher.run(recipients(), send, collect=False)
+        if cancelled.is_set():
+            status = "cancelled"
+    except Exception as e:
+        status = "failed"
+        logger.error(f"Campaign {campaign_id} failed: {e}")
+        raise
+    finally:
+        progress.cancel()
+        # Leaves a cancellation that arrived after the last progress check in place
+        await finish_campaign(campaign_id, status, sent(), failed(), checkpoint())
+        logger.info(f"Campaign {campaign_id} {status}: {dispatcher.stats.snapshot()}")
+
+async def resume_stalled_campaigns():
+    """Scheduler job: restart running campaigns whose runner stopped checkpointing"""
+    now = time.time()
+    for campaign_id in await claim_stalled_campaigns(now, now - settings.CAMPAIGN_STALE_SECONDS):
+        logger.warning(f"Campaign {campaign_id} stalled, rescheduling it")
+        await scheduler.schedule_campaign(campaign_id, datetime.now(timezone.utc))
+
+async def get_campaign_progress(campaign_id: str) -> Optional[dict]:
+    campaign = await get_campaign(campaign_id)
+    if campaign is not None:
+        campaign.pop("content", None)
+        heartbeat_at = campaign.pop("heartbeat_at", None)
+        campaign["stalled"] = campaign["status"] == "running" and (
+            heartbeat_at is None or heartbeat_at < time.time() - settings.CAMPAIGN_STALE_SECONDS
+        )
+    return campaign
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable, List, Optional, Union
+from app.core.config import settings
+from app.utils.metrics import batch_duration, batch_size
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+class DispatchStats:
+    """Throughput and latency counters for dispatched sends"""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.sent = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def record(self, latency: float, ok: bool):
+        if ok:
+            self.sent += 1
+        else:
+            self.failed += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def snapshot(self) -> dict:
+        completed = self.sent + self.failed
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "elapsed_seconds": round(elapsed, 3),
+            "throughput_per_second": round(completed / elapsed, 2),
+            "avg_latency_ms": round(self.total_latency / completed * 1000, 2) if completed else 0.0,
+            "max_latency_ms": round(self.max_latency * 1000, 2)
+        }
+
+# Process-wide totals across all batches
+dispatch_stats = DispatchStats()
+
+class RateLimiter:
+    """Spaces calls evenly so no more than ``rate`` start per second"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class BatchDispatcher:
+    """Fan sends out over a bounded pool of asyncio worker tasks.
+
+    Items are fed through a bounded queue so producers never run far ahead of
+    the workers. Each item is handled in isolation: an exception raised by the
+    handler is recorded as an error result and the remaining items continue.
+    With ``rate`` set, sends are additionally paced to that many per second.
+    ``kind`` labels the batch size and duration metrics.
+    """
+
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        rate: Optional[float] = None,
+        kind: str = "batch"
+    ):
+        self.kind = kind
+        self.concurrency = max(concurrency or settings.BATCH_CONCURRENCY, 1)
+        self.queue_size = queue_size or settings.BATCH_QUEUE_SIZE
+        self.limiter = RateLimiter(rate) if rate else None
+        self.stats = DispatchStats()
+
+    async def run(
+        self,
+        items: Union[Iterable[Any], AsyncIterable[Any]],
+        handler: Callable[[Any], Awaitable[dict]],
+        collect: bool = True
+    ) -> List[dict]:
+        """Dispatch every item and return the results, or an empty list when
+        ``collect`` is False and only the stats are of interest."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        results: List[dict] = []
+        self.stats = DispatchStats()
+        start = time.monotonic()
+
+        async def produce():
+            try:
+                if hasattr(items, "__aiter__"):
+                    async for item in items:
+                        await queue.put(item)
+                else:
+                    for item in items:
+                        await queue.put(item)
+            finally:
+                for _ in range(self.concurrency):
+                    await queue.put(_STOP)
+
+        async def work():
+            while True:
+                item = await queue.get()
+                if item is _STOP:
+                    return
+                result = await self._dispatch(item, handler)
+                if collect:
+                    results.append(result)
+
+        workers = [asyncio.create_task(work()) for _ in range(self.concurrency)]
+        try:
+            await produce()
+            await asyncio.gather(*workers)
+        except BaseException:
+            for worker in workers:
+                worker.cancel()
+            raise
+
+        batch_size.labels(self.kind).observe(self.stats.sent + self.stats.failed)
+        batch_duration.labels(self.kind).observe(time.monotonic() - start)
+        logger.info(f"Batch dispatch finished: {self.stats.snapshot()}")
+        return results
+
+    async def _dispatch(self, item: Any, handler: Callable[[Any], Awaitable[dict]]) -> dict:
+        if self.limiter is not None:
+            await self.limiter.wait()
+        self.stats.in_flight += 1
+        dispatch_stats.in_flight += 1
+        start = time.monotonic()
+        try:
+            result = await handler(item)
+        except Exception as e:
+            # Outbox entries carry the message payload, which stays out of the logs
+            target = item.get("outbox_id") if isinstance(item, dict) else item
+            logger.error(f"Failed to dispatch message to {target}: {e}")
+            result = {"recipient": item, "status": "error", "message": str(e)}
+        finally:
+            self.stats.in_flight -= 1
+            dispatch_stats.in_flight -= 1
+
+        latency = time.monotonic() - start
+        ok = result.get("status") != "error"
+        self.stats.record(latency, ok)
+        dispatch_stats.record(latency, ok)
+        return result
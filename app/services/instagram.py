@@ -1,7 +1,10 @@
 from typing import Optional
-from app.api.instagram import InstagramClient
+from app.clients.http import graph_message_id
+from app.core.config import settings
+from app.clients.instagram import InstagramClient
 from app.utils.db import save_message
 from app.core.scheduler import scheduler
+from app.services.outbox import outbox
 import logging
 from tenacity import retry, stop_after_attempt, wait_exponential
 
@@ -11,10 +14,25 @@ class InstagramService:
     def __init__(self):
         self.client = InstagramClient()
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
     async def send_message(self, recipient_id: str, message: str) -> dict:
+        if settings.OUTBOX_MODE:
+            outbox_id = await outbox.enqueue("instagram", "text", recipient_id, {"message": message})
+            return {"outbox_id": outbox_id, "status": "pending"}
+        return await self._send_message_now(recipient_id, message)
+
+    async def send_media(self, recipient_id: str, media_url: str, media_type: str) -> dict:
+        if settings.OUTBOX_MODE:
+            outbox_id = await outbox.enqueue("instagram", "media", recipient_id, {
+                "media_url": media_url,
+                "media_type": media_type
+            })
+            return {"outbox_id": outbox_id, "status": "pending"}
+        return await self._send_media_now(recipient_id, media_url, media_type)
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+    async def _send_message_now(self, recipient_id: str, message: str) -> dict:
         try:
-            response = self.client.send_message(recipient_id, message)
+            response = await self.client.send_message(recipient_id, message)
             if "error" in response:
                 logger.error(f"Instagram API error: {response['error']}")
                 raise Exception(response['error'])
@@ -23,7 +41,7 @@ class InstagramService:
                 "recipient": recipient_id,
                 "message": message,
                 "platform": "instagram"
-            }, response.get("message_id"))
+            }, graph_message_id(response))
             
             return response
         except Exception as e:
@@ -31,9 +49,9 @@ class InstagramService:
             raise
 
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-    async def send_media(self, recipient_id: str, media_url: str, media_type: str) -> dict:
+    async def _send_media_now(self, recipient_id: str, media_url: str, media_type: str) -> dict:
         try:
-            response = self.client.send_media(recipient_id, media_url, media_type)
+            response = await self.client.send_media(recipient_id, media_url, media_type)
             if "error" in response:
                 logger.error(f"Instagram API error: {response['error']}")
                 raise Exception(response['error'])
@@ -43,7 +61,7 @@ class InstagramService:
                 "media_url": media_url,
                 "media_type": media_type,
                 "platform": "instagram"
-            }, response.get("message_id"))
+            }, graph_message_id(response))
             
             return response
         except Exception as e:
@@ -52,7 +70,7 @@ class InstagramService:
 
     async def schedule_message(self, recipient_id: str, message: str, scheduled_time) -> str:
         try:
-            job_id = scheduler.schedule_instagram_message(
+            job_id = await scheduler.schedule_instagram_message(
                 recipient_id,
                 message,
                 scheduled_time
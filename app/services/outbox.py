@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import random
+import time
+import uuid
+from typing import Optional
+import httpx
+from app.core.config import settings
+from app.clients.breaker import CircuitOpenError
+from app.clients.governor import RATE_LIMIT_CODES, governor
+from app.clients.http import graph_message_id
+from app.clients.instagram import InstagramClient
+from app.clients.whatsapp import WhatsAppClient
+from app.services.dispatcher import BatchDispatcher
+from app.utils.metrics import queue_depth
+from app.utils.db import (
+    claim_outbox, complete_outbox, dead_letter_outbox, enqueue_outbox,
+    prune_outbox, retry_outbox, save_message
+)
+
+logger = logging.getLogger(__name__)
+
+# Graph error codes worth retrying besides rate limits: unknown/service errors
+TRANSIENT_ERROR_CODES = frozenset({1, 2}) | RATE_LIMIT_CODES
+
+_PRUNE_INTERVAL = 3600
+
+class DeliveryError(Exception):
+    def __init__(self, message: str, retryable: bool):
+        super().__init__(message)
+        self.retryable = retryable
+
+def _check_response(response: dict):
+    error = response.get("error")
+    if error is None:
+        return
+    if not isinstance(error, dict):
+        raise DeliveryError(str(error), retryable=False)
+    retryable = error.get("is_transient") or error.get("code") in TRANSIENT_ERROR_CODES
+    raise DeliveryError(f"{error.get('code')}: {error.get('message')}", retryable=bool(retryable))
+
+class OutboxDrainer:
+    """Delivers outbox rows in the background.
+
+    A single poller leases due rows (OUTBOX_CLAIM_BATCH at a time) and fans
+    them out over OUTBOX_WORKERS dispatcher workers. Transient failures are
+    retried with jittered exponential backoff; permanent failures and rows
+    that used up OUTBOX_MAX_ATTEMPTS move to the dead-letter table.
+    """
+
+    def __init__(self):
+        self.whatsapp: Optional[WhatsAppClient] = None
+        self.instagram: Optional[InstagramClient] = None
+        self.dispatcher = BatchDispatcher(concurrency=settings.OUTBOX_WORKERS, queue_size=settings.OUTBOX_CLAIM_BATCH, kind="outbox")
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._pruned_at = 0.0
+        self.delivered = 0
+        self.retried = 0
+        self.dead = 0
+
+    async def enqueue(self, platform: str, kind: str, recipient: str, payload: dict) -> str:
+        """Store a send intent and wake the poller; returns the outbox ID"""
+        outbox_id = str(uuid.uuid4())
+        await enqueue_outbox({
+            "outbox_id": outbox_id,
+            "platform": platform,
+            "kind": kind,
+            "recipient": recipient,
+            "payload": payload,
+            "next_attempt_at": time.time()
+        })
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return outbox_id
+
+    def start(self):
+        if self._task is None:
+            self.whatsapp = WhatsAppClient()
+            self.instagram = InstagramClient()
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Finish the batch in flight; undelivered rows stay in the outbox"""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        logger.info(f"Outbox drainer stopped: {self.stats()}")
+
+    def stats(self) -> dict:
+        return {
+            "delivered": self.delivered,
+            "retried": self.retried,
+            "dead": self.dead,
+            "in_flight": self.dispatcher.stats.in_flight
+        }
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                limit = self._claim_size()
+                entries = await claim_outbox(limit, time.time(), settings.OUTBOX_LEASE_SECONDS, settings.OUTBOX_MAX_ATTEMPTS)
+                if entries:
+                    await self.dispatcher.run(entries, self._deliver, collect=False)
+                await self._prune()
+            except Exception as e:
+                limit, entries = 1, []
+                logger.error(f"Outbox drain cycle failed: {e}", exc_info=True)
+            # A full batch suggests more is due; otherwise wait for new work
+            if len(entries) < limit and not self._stopping:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), settings.OUTBOX_POLL_INTERVAL_MS / 1000)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    def _claim_size(self) -> int:
+        """Claim no more rows than the slowest sender can send within half a lease.
+
+        Otherwise rows queued behind a throttled governor outlive their lease
+        and another worker reclaims and sends them a second time.
+        """
+        rate = min(
+            governor.bucket(self.whatsapp.governor_key).rate,
+            governor.bucket(self.instagram.governor_key).rate
+        )
+        return max(1, min(settings.OUTBOX_CLAIM_BATCH, int(rate * settings.OUTBOX_LEASE_SECONDS / 2)))
+
+    async def _deliver(self, entry: dict) -> dict:
+        try:
+            response = await self._send(entry)
+            _check_response(response)
+        except (DeliveryError, CircuitOpenError, httpx.TransportError) as e:
+            retryable = not isinstance(e, DeliveryError) or e.retryable
+            await self._fail(entry, str(e), retryable)
+            return {"recipient": entry["recipient"], "status": "error", "message": str(e)}
+        except Exception as e:
+            # e.g. a non-JSON 502 body; retried until the attempts run out
+            logger.error(f"Unexpected error delivering outbox message {entry['outbox_id']}: {e!r}")
+            await self._fail(entry, repr(e), retryable=True)
+            return {"recipient": entry["recipient"], "status": "error", "message": repr(e)}
+
+        message_id = graph_message_id(response)
+        await complete_outbox(entry["outbox_id"], message_id)
+        await save_message(
+            {**entry["payload"], "recipient": entry["recipient"], "platform": entry["platform"]},
+            message_id or entry["outbox_id"],
+            wait=False
+        )
+        self.delivered += 1
+        return {"recipient": entry["recipient"], "status": "success", "message_id": message_id}
+
+    async def _send(self, entry: dict) -> dict:
+        payload, recipient = entry["payload"], entry["recipient"]
+        kind = (entry["platform"], entry["kind"])
+        if kind == ("whatsapp", "text"):
+            return await self.whatsapp.send_message(recipient, payload["message"])
+        if kind == ("whatsapp", "template"):
+            return await self.whatsapp.send_template(recipient, payload["template_name"], payload["language_code"])
+        if kind == ("instagram", "text"):
+            return await self.instagram.send_message(recipient, payload["message"])
+        if kind == ("instagram", "media"):
+            return await self.instagram.send_media(recipient, payload["media_url"], payload["media_type"])
+        raise DeliveryError(f"Unknown outbox message kind {kind}", retryable=False)
+
+    async def _fail(self, entry: dict, error: str, retryable: bool):
+        if retryable and entry["attempts"] < settings.OUTBOX_MAX_ATTEMPTS:
+            backoff = min(
+                settings.OUTBOX_BACKOFF_MAX_SECONDS,
+                settings.OUTBOX_BACKOFF_BASE_SECONDS * 2 ** (entry["attempts"] - 1)
+            )
+            # Jitter keeps the retries from one outage from arriving together
+            await retry_outbox(entry["outbox_id"], error, time.time() + random.uniform(backoff / 2, backoff))
+            self.retried += 1
+        else:
+            await dead_letter_outbox(entry["outbox_id"], error)
+            self.dead += 1
+            logger.warning(f"Outbox message {entry['outbox_id']} dead-lettered after {entry['attempts']} attempts: {error}")
+
+    async def _prune(self):
+        if time.monotonic() - self._pruned_at > _PRUNE_INTERVAL:
+            self._pruned_at = time.monotonic()
+            await prune_outbox(settings.OUTBOX_RETENTION_HOURS)
+
+outbox = OutboxDrainer()
+
+# Rows claimed by this process and not yet delivered or rescheduled
+queue_depth.labels("outbox_in_flight").set_function(lambda: outbox.dispatcher.stats.in_flight)
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.clients.whatsapp import WhatsAppClient
+
+logger = logging.getLogger(__name__)
+
+class TemplateCatalogError(Exception):
+    pass
+
+class TemplateCatalog:
+    """In-process cache of the WhatsApp template catalog.
+
+    Every page is fetched on refresh and indexed by (name, language). Entries
+    older than TEMPLATE_CACHE_TTL are served while a background refresh runs,
+    and concurrent misses share a single in-flight fetch.
+    """
+
+    def __init__(self, client: Optional[WhatsAppClient] = None, ttl: Optional[int] = None):
+        self.client = client or WhatsAppClient()
+        self.ttl = ttl if ttl is not None else settings.TEMPLATE_CACHE_TTL
+        self._templates: Optional[List[dict]] = None
+        self._index: Dict[Tuple[str, str], dict] = {}
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def list(self) -> List[dict]:
+        await self._ensure_loaded()
+        return self._templates
+
+    async def get(self, name: str, language: str) -> Optional[dict]:
+        await self._ensure_loaded()
+        return self._index.get((name, language))
+
+    def invalidate(self):
+        """Drop the cached catalog so the next read fetches it again"""
+        self._generation += 1
+        self._templates = None
+        self._index = {}
+
+    async def _ensure_loaded(self):
+        if self._templates is None:
+            await self._refresh()
+        elif time.monotonic() - self._loaded_at > self.ttl:
+            # Serve the stale copy while a refresh runs in the background
+            self._start_refresh()
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._load())
+            self._refresh_task.add_done_callback(self._log_refresh_failure)
+        return self._refresh_task
+
+    async def _refresh(self):
+        # Shielded so a cancelled request does not cancel the shared fetch.
+        # A fetch that an invalidate() overtook stores nothing, so keep going
+        # until one for the current generation lands.
+        while self._templates is None:
+            await asyncio.shield(self._start_refresh())
+
+    async def _load(self):
+        generation = self._generation
+        response = await self.client.get_all_templates()
+        if "error" in response:
+            raise TemplateCatalogError(response["error"])
+
+        templates = response.get("data", [])
+        if generation != self._generation:
+            return
+        self._templates = templates
+        self._index = {(t.get("name"), t.get("language")): t for t in templates}
+        self._loaded_at = time.monotonic()
+        logger.info(f"Loaded {len(templates)} WhatsApp templates into the catalog cache")
+
+    def _log_refresh_failure(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Template catalog refresh failed: {task.exception()}")
+
+template_catalog = TemplateCatalog()
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import logging
+import time
+from typing import List, Optional, Set, Tuple
+from app.core.config import settings
+from app.utils.db import (
+    find_seen_webhook_events, mark_webhook_events_seen, prune_webhook_events,
+    save_inbound_messages, update_message_status
+)
+from app.utils.dedup import EventDeduplicator
+from app.utils.metrics import queue_depth
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+_PRUNE_INTERVAL = 3600
+
+def _message_body(message: dict) -> Optional[str]:
+    message_type = message.get("type")
+    if message_type == "text":
+        return message.get("text", {}).get("body")
+    if message_type == "button":
+        return message.get("button", {}).get("text")
+    if message_type == "interactive":
+        interactive = message.get("interactive", {})
+        reply = interactive.get("button_reply") or interactive.get("list_reply") or {}
+        return reply.get("title")
+    # Media messages carry an optional caption
+    return (message.get(message_type) or {}).get("caption")
+
+def parse_webhook(payload: dict) -> Tuple[List[dict], List[dict]]:
+    """Collect every inbound message and status update in a webhook payload"""
+    messages, statuses = [], []
+    for entry in payload.get("entry", []):
+        for change in entry.get("changes", []):
+            value = change.get("value", {})
+            phone_number_id = value.get("metadata", {}).get("phone_number_id")
+            names = {
+                contact.get("wa_id"): contact.get("profile", {}).get("name")
+                for contact in value.get("contacts", [])
+            }
+            for message in value.get("messages", []):
+                messages.append({
+                    "id": message["id"],
+                    "from": message["from"],
+                    "phone_number_id": phone_number_id,
+                    "contact_name": names.get(message["from"]),
+                    "type": message.get("type"),
+                    "body": _message_body(message),
+                    "timestamp": message.get("timestamp"),
+                    "payload": message
+                })
+            statuses.extend(value.get("statuses", []))
+    return messages, statuses
+
+def _event_key(event: dict, is_status: bool) -> str:
+    # A message moves through several statuses, each delivered separately
+    return f"s:{event['id']}:{event.get('status')}" if is_status else f"m:{event['id']}"
+
+def _take_new(events: List[dict], new: Set[str], is_status: bool) -> List[dict]:
+    # Keys are consumed so a duplicate within the same batch is dropped too
+    kept = []
+    for event in events:
+        key = _event_key(event, is_status)
+        if key in new:
+            new.discard(key)
+            kept.append(event)
+    return kept
+
+class WebhookIngestor:
+    """Acknowledge webhooks immediately and process them in the background.
+
+    Raw request bodies go onto a bounded in-process queue. Consumer tasks
+    drain up to WEBHOOK_BATCH_SIZE payloads at a time, walk every entry,
+    change, message and status, and persist each batch in one group commit.
+    Events already seen (Meta retries and duplicates) are skipped.
+    """
+
+    def __init__(self, consumers: Optional[int] = None, queue_size: Optional[int] = None, batch_size: Optional[int] = None):
+        self.consumers = max(consumers or settings.WEBHOOK_CONSUMERS, 1)
+        self.queue_size = queue_size or settings.WEBHOOK_QUEUE_SIZE
+        self.batch_size = batch_size or settings.WEBHOOK_BATCH_SIZE
+        if settings.WEBHOOK_DEDUP_PERSISTENT:
+            self.dedup = EventDeduplicator(find_seen=find_seen_webhook_events, mark_seen=mark_webhook_events_seen)
+        else:
+            self.dedup = EventDeduplicator()
+        self._pruned_at = time.monotonic()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.received = 0
+        self.dropped = 0
+        self.invalid = 0
+        self.messages = 0
+        self.statuses = 0
+        self.duplicates = 0
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def start(self):
+        if not self._tasks:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._tasks = [asyncio.create_task(self._consume()) for _ in range(self.consumers)]
+
+    def submit(self, body: bytes) -> bool:
+        """Queue a raw webhook body; False when the queue is full or stopped"""
+        if not self._tasks:
+            return False
+        try:
+            self._queue.put_nowait(body)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.received += 1
+        return True
+
+    async def stop(self):
+        """Process everything queued so far and stop the consumers"""
+        if not self._tasks:
+            return
+        for _ in self._tasks:
+            await self._queue.put(_STOP)
+        await asyncio.gather(*self._tasks)
+        self._tasks = []
+        logger.info(f"Webhook ingestor stopped: {self.stats()}")
+
+    def stats(self) -> dict:
+        return {
+            "received": self.received,
+            "pending": self.pending,
+            "dropped": self.dropped,
+            "invalid": self.invalid,
+            "messages": self.messages,
+            "statuses": self.statuses,
+            "duplicates": self.duplicates,
+            "dedup": self.dedup.stats()
+        }
+
+    async def _consume(self):
+        while True:
+            batch = [await self._queue.get()]
+            while batch[-1] is not _STOP and len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            stop = batch[-1] is _STOP
+            try:
+                await self._process([body for body in batch if body is not _STOP])
+            except Exception as e:
+                logger.error(f"Failed to process batch of {len(batch)} webhooks: {e}", exc_info=True)
+            if stop:
+                return
+
+    async def _process(self, bodies: List[bytes]):
+        messages, statuses = [], []
+        for body in bodies:
+            try:
+                payload_messages, payload_statuses = parse_webhook(json.loads(body))
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                self.invalid += 1
+                logger.warning(f"Discarding malformed webhook payload: {e}")
+                continue
+            messages.extend(payload_messages)
+            statuses.extend(payload_statuses)
+
+        events = len(messages) + len(statuses)
+        new = await self.dedup.filter_new(
+            [_event_key(message, False) for message in messages] + [_event_key(status, True) for status in statuses]
+        )
+        # _take_new consumes its argument; the keys are committed or released below
+        keys = set(new)
+        messages = _take_new(messages, new, False)
+        statuses = _take_new(statuses, new, True)
+        self.duplicates += events - len(messages) - len(statuses)
+
+        if settings.WEBHOOK_DEDUP_PERSISTENT and time.monotonic() - self._pruned_at > _PRUNE_INTERVAL:
+            self._pruned_at = time.monotonic()
+            await prune_webhook_events(settings.WEBHOOK_DEDUP_RETENTION_HOURS)
+        try:
+            if messages:
+                await save_inbound_messages(messages)
+            # Queued without yielding, so they share one flush window and
+            # waiting on the last one covers them all
+            for index, status in enumerate(statuses):
+                await update_message_status(status["id"], status["status"], wait=index == len(statuses) - 1)
+        except Exception:
+            # Not stored, so Meta's redelivery must not be dropped as a duplicate
+            self.dedup.release(keys)
+            raise
+        self.messages += len(messages)
+        self.statuses += len(statuses)
+        await self.dedup.commit(keys)
+
+webhook_ingestor = WebhookIngestor()
+
+queue_depth.labels("webhook").set_function(lambda: webhook_ingestor.pending)
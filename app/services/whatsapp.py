@@ -1,18 +1,31 @@
-import pandas as pd
-from typing import List, Optional
-from app.api.whatsapp import WhatsAppClient
+import asyncio
+from typing import AsyncIterable, AsyncIterator, Dict, List, Optional
+from app.core.config import settings
+from app.clients.http import graph_message_id
+from app.clients.whatsapp import WhatsAppClient, CompiledTemplate
 from app.models.templates import WhatsAppTemplate, TemplateMessage
-from app.models.messages import ScheduledMessage
+from app.models.messages import ScheduledMessage, BatchMessage
 from app.core.scheduler import scheduler
 from app.utils.db import save_message, get_message_history
-from app.utils.phone_validator import validate_phone_number
+from app.utils.phone_validator import validate_phone_numbers
+from app.services.dispatcher import BatchDispatcher
+from app.services.outbox import outbox
+from app.utils.csv_stream import StreamReader, iter_csv_column
+
+def _error_code(error) -> str:
+    code = error.get("code") if isinstance(error, dict) else None
+    return str(code) if code is not None else "unknown"
 
 class WhatsAppService:
     def __init__(self):
         self.client = WhatsAppClient()
+        self.dispatcher = BatchDispatcher(kind="template")
+        # Filled in by stream_csv_recipients and uncollected batch sends
+        self.csv_counts = {"rows": 0, "invalid": 0, "duplicates": 0}
+        self.error_counts: Dict[str, int] = {}
 
     async def send_scheduled_message(self, message: ScheduledMessage):
-        job_id = scheduler.schedule_message(
+        job_id = await scheduler.schedule_message(
             message.recipient,
             message.message,
             message.scheduled_time
@@ -21,43 +34,92 @@ class WhatsAppService:
         return job_id
 
     async def send_template_message(self, template_msg: TemplateMessage):
-        response = self.client.send_template(
+        if settings.OUTBOX_MODE:
+            outbox_id = await outbox.enqueue("whatsapp", "template", template_msg.recipient, {
+                "template_name": template_msg.template_name,
+                "language_code": template_msg.language_code
+            })
+            return {"outbox_id": outbox_id, "status": "pending"}
+        response = await self.client.send_template(
             template_msg.recipient,
             template_msg.template_name,
             template_msg.language_code
         )
-        await save_message(template_msg, response.get("message_id"))
+        await save_message(template_msg, graph_message_id(response))
         return response
 
-    async def get_chat_history(self, phone_number: str) -> List[dict]:
-        return await get_message_history(phone_number)
+    async def get_chat_history(self, phone_number: str, limit: int = 100) -> List[dict]:
+        return await get_message_history(phone_number, limit)
 
     async def process_csv_recipients(self, file_path: str) -> List[str]:
+        # pandas is heavy to import and only needed here
+        import pandas as pd
         df = pd.read_csv(file_path)
         phone_column = df.columns[0]  # Assume first column contains phone numbers
-        valid_numbers = []
-        
-        for phone in df[phone_column]:
-            is_valid, formatted = validate_phone_number(str(phone))
-            if is_valid:
-                valid_numbers.append(formatted)
-                
-        return valid_numbers
-
-    async def send_batch_template(self, batch_msg: BatchMessage):
+        validated = await asyncio.to_thread(validate_phone_numbers, df[phone_column])
+        return [formatted for is_valid, formatted in validated if is_valid]
+
+    async def stream_csv_recipients(self, chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+        """Yield valid, deduplicated E.164 numbers from CSV bytes as they arrive"""
+        # Numbers are remembered as ints to keep the seen-set small on huge files
+        seen = set()
+        reader = StreamReader(chunks)
+        async for chunk in iter_csv_column(reader.read, settings.CSV_CHUNK_SIZE):
+            self.csv_counts["rows"] += len(chunk)
+            validated = await asyncio.to_thread(validate_phone_numbers, chunk)
+            for is_valid, formatted in validated:
+                if not is_valid:
+                    self.csv_counts["invalid"] += 1
+                    continue
+                key = int(formatted[1:])
+                if key in seen:
+                    self.csv_counts["duplicates"] += 1
+                    continue
+                seen.add(key)
+                yield formatted
+
+    async def send_batch_template(
+        self,
+        batch_msg: BatchMessage,
+        recipients: Optional[AsyncIterable[str]] = None,
+        collect: bool = True
+    ):
+        """Send a template to every recipient of the batch.
+
+        ``batch_msg.recipients`` are validated in bulk before sending.
+        ``recipients`` may instead be a stream of already validated numbers,
+        such as the one returned by ``stream_csv_recipients``. With
+        ``collect`` False no per-recipient results are kept; failures are
+        only counted by error code in ``error_counts``.
+        """
         results = []
-        for recipient in batch_msg.recipients:
-            is_valid, formatted_number = validate_phone_validator(recipient)
-            if not is_valid:
-                results.append({"recipient": recipient, "status": "error", "message": formatted_number})
-                continue
-
-            response = await self.client.send_template_with_content(
-                formatted_number,
-                batch_msg.template_name,
-                batch_msg.content,
-                batch_msg.language_code
-            )
-            results.append({"recipient": recipient, "status": "success", "message_id": response.get("message_id")})
-        
+        if recipients is None:
+            validated = await asyncio.to_thread(validate_phone_numbers, batch_msg.recipients)
+            recipients = []
+            for recipient, (is_valid, formatted) in zip(batch_msg.recipients, validated):
+                if is_valid:
+                    recipients.append(formatted)
+                else:
+                    results.append({"recipient": recipient, "status": "error", "message": formatted})
+
+        compiled = self.compile_batch(batch_msg)
+
+        async def send_one(recipient: str) -> dict:
+            result = await self.send_batch_recipient(compiled, recipient)
+            if not collect and result["status"] == "error":
+                code = _error_code(result["message"])
+                self.error_counts[code] = self.error_counts.get(code, 0) + 1
+            return result
+
+        results.extend(await self.dispatcher.run(recipients, send_one, collect=collect))
         return results
+
+    def compile_batch(self, batch_msg: BatchMessage) -> CompiledTemplate:
+        return self.client.compile_template(batch_msg.template_name, batch_msg.content, batch_msg.language_code)
+
+    async def send_batch_recipient(self, compiled: CompiledTemplate, recipient: str) -> dict:
+        """Send a compiled batch template to one validated recipient"""
+        response = await self.client.send_compiled_template(recipient, compiled)
+        if "error" in response:
+            return {"recipient": recipient, "status": "error", "message": response["error"]}
+        return {"recipient": recipient, "status": "success", "message_id": graph_message_id(response)}
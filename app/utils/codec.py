@@ -0,0 +1,66 @@
+import json
+import logging
+import zlib
+from typing import Optional, Union
+from app.core.config import settings
+
+try:
+    import msgpack
+except ImportError:  # optional: fall back to compact JSON
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+# Encoded values are BLOBs whose first byte names the format; the high bit
+# marks a zlib-compressed body. Legacy rows are JSON TEXT with no header.
+_JSON = 0x01
+_MSGPACK = 0x02
+_COMPRESSED = 0x80
+
+class ContentCodecError(Exception):
+    pass
+
+class ContentCodec:
+    """Encodes message content for the ``messages.content`` column"""
+
+    def __init__(self, codec: Optional[str] = None, compress_threshold: Optional[int] = None):
+        codec = (codec or settings.DB_CONTENT_CODEC).lower()
+        if codec not in ("msgpack", "json"):
+            raise ValueError(f"Unknown content codec: {codec}")
+        if codec == "msgpack" and msgpack is None:
+            logger.warning("msgpack content codec requested but 'msgpack' is not installed, using JSON")
+            codec = "json"
+        self.codec = codec
+        self.compress_threshold = (
+            compress_threshold if compress_threshold is not None else settings.DB_CONTENT_COMPRESS_THRESHOLD
+        )
+
+    def encode(self, content: dict) -> bytes:
+        if self.codec == "msgpack":
+            tag, body = _MSGPACK, msgpack.packb(content, default=str, use_bin_type=True)
+        else:
+            tag, body = _JSON, json.dumps(content, default=str, separators=(",", ":")).encode()
+        if len(body) > self.compress_threshold:
+            compressed = zlib.compress(body)
+            if len(compressed) < len(body):
+                tag, body = tag | _COMPRESSED, compressed
+        return bytes((tag,)) + body
+
+    def decode(self, value: Union[bytes, str]) -> dict:
+        # Rows written before the codec existed hold plain JSON text
+        if isinstance(value, str):
+            return json.loads(value)
+
+        tag, body = value[0], value[1:]
+        if tag & _COMPRESSED:
+            tag, body = tag & ~_COMPRESSED, zlib.decompress(body)
+        if tag == _MSGPACK:
+            if msgpack is None:
+                raise ContentCodecError("Stored content is msgpack encoded but 'msgpack' is not installed")
+            return msgpack.unpackb(body, raw=False)
+        if tag == _JSON:
+            return json.loads(body)
+        # Untagged bytes: JSON stored as a BLOB
+        return json.loads(value)
+
+content_codec = ContentCodec()
@@ -0,0 +1,139 @@
+import codecs
+import csv
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, List, Tuple
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+def _split_records(text: str, record: str, quotes: int) -> Tuple[List[str], str, int, str]:
+    """Split decoded CSV text into complete records.
+
+    Lines are split on "\n" only. A line whose record still has an odd number
+    of quote characters ends inside a quoted field, so it is joined with the
+    next one. Returns the complete records, the unfinished record with its
+    quote count, and the trailing line that has no terminator yet.
+    """
+    lines = text.split("\n")
+    tail = lines.pop()
+    records = []
+    for line in lines:
+        record += line + "\n"
+        quotes += line.count('"')
+        if quotes % 2 == 0:
+            records.append(record)
+            record, quotes = "", 0
+    return records, record, quotes, tail
+
+async def iter_csv_column(
+    read: Callable[[int], Awaitable[bytes]],
+    chunk_size: int,
+    column: int = 0,
+    skip_header: bool = True
+) -> AsyncIterator[List[str]]:
+    """Parse a CSV byte stream chunk by chunk, yielding one column per chunk.
+
+    ``read`` is an async callable such as ``StreamReader.read``. Only whole
+    records reach ``csv.reader``, so quoted fields that contain newlines or
+    span a chunk boundary are parsed intact. Only the current chunk and the
+    unfinished record are held in memory.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    record, quotes, tail = "", 0, ""
+    header_seen = not skip_header
+
+    while True:
+        data = await read(chunk_size)
+        final = not data
+        records, record, quotes, tail = _split_records(tail + decoder.decode(data or b"", final=final), record, quotes)
+        if final and (record or tail):
+            records.append(record + tail)
+
+        values = []
+        for row in csv.reader(records):
+            if not header_seen:
+                header_seen = True
+                continue
+            if len(row) > column and row[column].strip():
+                values.append(row[column].strip())
+
+        if values:
+            yield values
+        if final:
+            return
+
+class StreamReader:
+    """File-like ``read`` over an async iterator of byte chunks"""
+
+    def __init__(self, chunks: AsyncIterable[bytes]):
+        self._chunks = chunks.__aiter__()
+        self._buffer = b""
+
+    async def read(self, size: int) -> bytes:
+        while not self._buffer:
+            try:
+                self._buffer = await self._chunks.__anext__()
+            except StopAsyncIteration:
+                return b""
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+async def iter_multipart_field(chunks: AsyncIterable[bytes], boundary: bytes, field: str) -> AsyncIterator[bytes]:
+    """Yield the content of one multipart form field while the body streams in"""
+    part: Dict[str, bytes] = {}
+    matched = False
+    output: List[bytes] = []
+
+    def on_part_begin():
+        nonlocal matched
+        part.clear()
+        matched = False
+
+    def on_header_field(data: bytes, start: int, end: int):
+        part["field"] = part.get("field", b"") + data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int):
+        part["value"] = part.get("value", b"") + data[start:end]
+
+    def on_header_end():
+        if part.pop("field", b"").lower() == b"content-disposition":
+            part["disposition"] = part.get("value", b"")
+        part.pop("value", None)
+
+    def on_headers_finished():
+        nonlocal matched
+        _, params = parse_options_header(part.get("disposition", b""))
+        matched = params.get(b"name") == field.encode()
+
+    def on_part_data(data: bytes, start: int, end: int):
+        if matched:
+            output.append(data[start:end])
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data
+    })
+    async for chunk in chunks:
+        parser.write(chunk)
+        if output:
+            yield b"".join(output)
+            output.clear()
+    parser.finalize()
+    if output:
+        yield b"".join(output)
+
+def csv_upload_chunks(content_type: str, body: AsyncIterable[bytes], field: str = "file") -> AsyncIterable[bytes]:
+    """CSV bytes of an upload sent either as raw text/csv or as a multipart form field.
+
+    Raises ValueError for any other content type.
+    """
+    media_type, params = parse_options_header(content_type)
+    if media_type == b"text/csv":
+        return body
+    if media_type == b"multipart/form-data":
+        boundary = params.get(b"boundary")
+        if not boundary:
+            raise ValueError("Multipart upload without a boundary")
+        return iter_multipart_field(body, boundary, field)
+    raise ValueError("CSV uploads must be text/csv or multipart/form-data")
@@ -1,11 +1,21 @@
 import aiosqlite
+import asyncio
 import json
 import logging
 import os
+import sqlite3
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Set, Tuple
 from tenacity import retry, stop_after_attempt, wait_exponential
 from app.core.config import settings
+from app.utils.codec import content_codec
+from app.utils.db_writer import MessageWriter
+from app.utils.db_pool import ConnectionPool, PooledConnection
+from app.utils.metrics import db_commit_latency, db_query_latency, queue_depth
+from app.utils.migrations import run_migrations
+from app.utils.status_coalescer import STATUS_RANK, StatusCoalescer
 
 logger = logging.getLogger(__name__)
 
@@ -13,11 +23,21 @@ class Database:
     def __init__(self):
         self._test_mode = False
         self.health_status = False
-        
-        # Create data directory if not exists
+        # One dedicated writer connection, shared by the group-commit writer
+        # and explicit transactions, plus a pool of read-only connections.
+        self.write_lock = asyncio.Lock()
+        self.writer = MessageWriter(lambda: self.conn, self.write_lock)
+        self.statuses = StatusCoalescer(lambda: self.conn, self.write_lock, self.writer.flush)
+        self.pool = ConnectionPool(
+            self._connect_reader,
+            min_size=settings.DB_MIN_CONNECTIONS,
+            max_size=settings.DB_MAX_CONNECTIONS,
+            timeout=settings.DB_CONNECTION_TIMEOUT / 1000
+        )
+
+        # The directory itself is created on connect, not at import
         self.data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data')
-        os.makedirs(self.data_dir, exist_ok=True)
-        
+
         if settings.is_production:
             self.db_path = settings.DATABASE_URL
         else:
@@ -25,7 +45,8 @@ class Database:
 
     def enable_test_mode(self):
         self._test_mode = True
-        self.db_path = ":memory:"
+        # Shared-cache memory database so pooled readers see the writer's data
+        self.db_path = "file:meta_test?mode=memory&cache=shared"
 
     async def connect(self):
         try:
@@ -38,8 +59,12 @@ class Database:
                 if not os.access(db_dir, os.W_OK):
                     raise PermissionError(f"No write permission for directory: {db_dir}")
 
-            self.conn = await aiosqlite.connect(self.db_path)
+            self.conn = await aiosqlite.connect(self.db_path, uri=self._test_mode)
+            await self._configure(self.conn)
             await self._create_tables()
+            await self.writer.start()
+            await self.statuses.start()
+            await self.pool.open()
             self.health_status = True
             logger.info(f"Connected to SQLite database: {self.db_path}")
         except Exception as e:
@@ -47,62 +72,148 @@ class Database:
             logger.error(f"Database connection failed: {str(e)}", exc_info=True)
             raise
 
+    async def _configure(self, conn):
+        # WAL lets readers proceed during commits; NORMAL sync is durable
+        # across application crashes and only fsyncs at checkpoints.
+        await conn.execute("PRAGMA journal_mode=WAL")
+        await conn.execute("PRAGMA synchronous=NORMAL")
+        await conn.execute("PRAGMA temp_store=MEMORY")
+        await conn.execute(f"PRAGMA cache_size=-{settings.DB_CACHE_SIZE_KB}")
+        await conn.execute(f"PRAGMA mmap_size={settings.DB_MMAP_SIZE}")
+        await conn.execute(f"PRAGMA busy_timeout={settings.DB_CONNECTION_TIMEOUT}")
+
+    async def _connect_reader(self) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(self.db_path, uri=self._test_mode)
+        conn.row_factory = sqlite3.Row
+        await conn.execute("PRAGMA query_only=1")
+        await conn.execute(f"PRAGMA cache_size=-{settings.DB_CACHE_SIZE_KB}")
+        await conn.execute(f"PRAGMA mmap_size={settings.DB_MMAP_SIZE}")
+        await conn.execute(f"PRAGMA busy_timeout={settings.DB_CONNECTION_TIMEOUT}")
+        if self._test_mode:
+            await conn.execute("PRAGMA read_uncommitted=1")
+        return conn
+
+    @asynccontextmanager
+    async def acquire(self, operation: str = "query"):
+        """Borrow a read connection from the pool.
+
+        The time from asking for the connection to handing it back is
+        recorded under ``operation``.
+        """
+        start = time.perf_counter()
+        try:
+            async with self.pool.acquire() as conn:
+                yield conn
+        finally:
+            db_query_latency.labels(operation).observe(time.perf_counter() - start)
+
+    @asynccontextmanager
+    async def transaction(self, operation: str = "transaction"):
+        """Run statements on the writer connection in one transaction"""
+        start = time.perf_counter()
+        async with self.write_lock:
+            try:
+                yield PooledConnection(self.conn)
+                await self.conn.commit()
+            except Exception:
+                await self.conn.rollback()
+                raise
+            finally:
+                db_commit_latency.labels(operation).observe(time.perf_counter() - start)
+
     async def _create_tables(self):
-        async with self.conn.cursor() as cur:
-            await cur.execute("""
-                CREATE TABLE IF NOT EXISTS messages (
-                    message_id TEXT PRIMARY KEY,
-                    recipient TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    status TEXT DEFAULT 'sent'
-                )
-            """)
-            await self.conn.commit()
+        version = await run_migrations(self.conn)
+        logger.info(f"Database schema at version {version}")
 
     async def close(self):
         if hasattr(self, 'conn'):
+            await self.statuses.stop()
+            await self.writer.stop()
+            await self.pool.close()
             await self.conn.close()
             logger.info("Database connection closed")
 
     async def clear_test_data(self):
         if self._test_mode:
+            await self.writer.flush()
             async with self.conn.cursor() as cur:
                 await cur.execute("DELETE FROM messages")
                 await self.conn.commit()
 
     async def check_health(self):
-        try:
-            async with self.conn.cursor() as cur:
-                await cur.execute("SELECT 1")
-                return True
-        except:
-            return False
+        self.health_status = await self.pool.check_health()
+        return self.health_status
+
+    def stats(self) -> dict:
+        return {
+            "healthy": self.health_status,
+            "readers": self.pool.stats(),
+            "writer": {
+                "pending": self.writer.pending,
+                "committed": self.writer.committed,
+                "batches": self.writer.batches
+            },
+            "statuses": {
+                "pending": self.statuses.pending,
+                "received": self.statuses.received,
+                "applied": self.statuses.applied,
+                "flushes": self.statuses.flushes
+            }
+        }
 
 db = Database()
 
+queue_depth.labels("db_writer").set_function(lambda: db.writer.pending)
+queue_depth.labels("status_updates").set_function(lambda: db.statuses.pending)
+
+def _message_content(message) -> dict:
+    return message if isinstance(message, dict) else message.dict()
+
+def _message_type(content: dict) -> str:
+    if content.get("template_name"):
+        return "template"
+    if content.get("media_url"):
+        return "media"
+    return "text"
+
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-async def save_message(message: dict, message_id: str) -> bool:
+async def save_message(message, message_id: str, wait: bool = True) -> bool:
+    """Queue a message row for the group-commit writer.
+
+    With ``wait`` the call returns once the row is committed, otherwise as
+    soon as it is queued.
+    """
     try:
-        async with db.conn.cursor() as cur:
-            await cur.execute(
-                """
-                INSERT INTO messages (message_id, recipient, content, status)
-                VALUES (?, ?, ?, ?)
-                """,
-                (message_id, message.recipient, json.dumps(message.dict()), "sent")
+        content = _message_content(message)
+        await db.writer.submit(
+            """
+            INSERT INTO messages (
+                message_id, recipient, content, status,
+                platform, direction, template_name, message_type
             )
-            await db.conn.commit()
-            return True
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                message_id,
+                content.get("recipient"),
+                content_codec.encode(content),
+                "sent",
+                content.get("platform", "whatsapp"),
+                content.get("direction", "outbound"),
+                content.get("template_name"),
+                _message_type(content)
+            ),
+            wait=wait
+        )
+        return True
     except Exception as e:
         logger.error(f"Failed to save message: {e}")
         raise
 
 async def get_message_history(phone_number: str, limit: int = 100) -> List[dict]:
     try:
-        async with db.conn.cursor() as cur:
-            await cur.execute(
+        async with db.acquire("get_message_history") as conn:
+            rows = await conn.fetch(
                 """
                 SELECT message_id, content, created_at, status
                 FROM messages 
@@ -110,13 +221,12 @@ async def get_message_history(phone_number: str, limit: int = 100) -> List[dict]
                 ORDER BY created_at DESC
                 LIMIT ?
                 """,
-                (phone_number, limit)
+                phone_number, limit
             )
-            rows = await cur.fetchall()
             return [
                 {
                     "message_id": row[0],
-                    "content": json.loads(row[1]),
+                    "content": content_codec.decode(row[1]),
                     "created_at": row[2],
                     "status": row[3]
                 }
@@ -126,29 +236,91 @@ async def get_message_history(phone_number: str, limit: int = 100) -> List[dict]
         logger.error(f"Failed to fetch message history: {e}")
         raise
 
-async def update_message_status(message_id: str, status: str) -> bool:
+async def update_message_status(message_id: str, status: str, wait: bool = True) -> bool:
+    """Record a delivery status through the coalescer.
+
+    Updates are batched per flush window and never move a message back to a
+    lower-ranked status (e.g. a late "delivered" after "read").
+    """
     try:
-        async with db.conn.cursor() as cur:
-            await cur.execute(
-                """
-                UPDATE messages
-                SET status = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE message_id = ?
-                """,
-                (status, message_id)
-            )
-            await db.conn.commit()
-            return cur.rowcount > 0
+        await db.statuses.update(message_id, status, wait=wait)
+        return True
     except Exception as e:
         logger.error(f"Failed to update message status: {e}")
         raise
 
+async def save_inbound_messages(messages: List[dict]):
+    """Store webhook messages in one group commit, ignoring redeliveries"""
+    for index, message in enumerate(messages):
+        await db.writer.submit(
+            """
+            INSERT OR IGNORE INTO inbound_messages (
+                message_id, contact, phone_number_id, contact_name,
+                message_type, body, payload, timestamp
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                message["id"],
+                message["from"],
+                message.get("phone_number_id"),
+                message.get("contact_name"),
+                message.get("type"),
+                message.get("body"),
+                content_codec.encode(message["payload"]),
+                int(message.get("timestamp") or 0)
+            ),
+            # Writes commit in order, so waiting on the last covers them all
+            wait=index == len(messages) - 1
+        )
+
+async def get_inbound_messages(contact: str, limit: int = 100) -> List[dict]:
+    async with db.acquire("get_inbound_messages") as conn:
+        rows = await conn.fetch(
+            """
+            SELECT * FROM inbound_messages
+            WHERE contact = ?
+            ORDER BY timestamp DESC
+            LIMIT ?
+            """,
+            contact, limit
+        )
+    messages = []
+    for row in rows:
+        message = dict(row)
+        message["payload"] = content_codec.decode(message["payload"])
+        messages.append(message)
+    return messages
+
+async def find_seen_webhook_events(keys: List[str]) -> Set[str]:
+    """Return the webhook event keys already recorded in the seen-set"""
+    seen = set()
+    async with db.acquire("find_seen_webhook_events") as conn:
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = await conn.fetch(
+                f"SELECT event_key FROM webhook_events WHERE event_key IN ({', '.join('?' * len(chunk))})",
+                *chunk
+            )
+            seen.update(row[0] for row in rows)
+    return seen
+
+async def mark_webhook_events_seen(keys: List[str]):
+    for key in keys:
+        await db.writer.submit("INSERT OR IGNORE INTO webhook_events (event_key) VALUES (?)", (key,), wait=False)
+
+async def prune_webhook_events(retention_hours: int):
+    await db.writer.submit(
+        "DELETE FROM webhook_events WHERE seen_at < datetime('now', ?)",
+        (f"-{retention_hours} hours",),
+        wait=False
+    )
+
 async def get_message_stats():
-    """Get messaging statistics from the database"""
-    async with db.acquire() as conn:
-        total = await conn.fetchval("SELECT COUNT(*) FROM messages")
-        whatsapp = await conn.fetchval("SELECT COUNT(*) FROM messages WHERE platform = 'whatsapp'")
-        instagram = await conn.fetchval("SELECT COUNT(*) FROM messages WHERE platform = 'instagram'")
+    """Get messaging statistics from the incrementally maintained counters"""
+    async with db.acquire("get_message_stats") as conn:
+        counters = await conn.fetch("SELECT platform, status, count FROM message_counters WHERE count != 0")
         recent = await conn.fetch(
             """
             SELECT * FROM messages 
@@ -156,24 +328,358 @@ async def get_message_stats():
             LIMIT 10
             """
         )
-        return {
-            "total": total,
-            "whatsapp": whatsapp,
-            "instagram": instagram,
-            "recent": [dict(msg) for msg in recent]
-        }
+
+    platforms, statuses = {}, {}
+    for row in counters:
+        platforms[row["platform"]] = platforms.get(row["platform"], 0) + row["count"]
+        statuses[row["status"]] = statuses.get(row["status"], 0) + row["count"]
+    return {
+        "total": sum(platforms.values()),
+        "whatsapp": platforms.get("whatsapp", 0),
+        "instagram": platforms.get("instagram", 0),
+        "by_status": statuses,
+        "recent": [_decode_row(msg) for msg in recent]
+    }
+
+def _decode_row(row) -> dict:
+    message = dict(row)
+    message["content"] = content_codec.decode(message["content"])
+    return message
+
+# Statuses ranked at or above "delivered", apart from the terminal "failed"
+_DELIVERED_STATUSES = frozenset(
+    status for status, rank in STATUS_RANK.items()
+    if rank >= STATUS_RANK["delivered"] and status != "failed"
+)
+
+ROLLUP_BUCKET_FORMATS = {
+    "minute": "%Y-%m-%d %H:%M",
+    "hour": "%Y-%m-%d %H:00",
+    "day": "%Y-%m-%d"
+}
+
+async def get_message_timeseries(
+    granularity: str,
+    start: datetime,
+    end: datetime,
+    platform: Optional[str] = None,
+    template_name: Optional[str] = None
+) -> List[dict]:
+    """Send volume and delivery rate per bucket, read from the rollup table"""
+    bucket_format = ROLLUP_BUCKET_FORMATS[granularity]
+    query = """
+        SELECT bucket, status, SUM(count) AS count
+        FROM message_rollups
+        WHERE granularity = ? AND bucket >= ? AND bucket <= ?
+    """
+    args = [granularity, start.strftime(bucket_format), end.strftime(bucket_format)]
+    if platform:
+        query += " AND platform = ?"
+        args.append(platform)
+    if template_name is not None:
+        query += " AND template_name = ?"
+        args.append(template_name)
+    query += " GROUP BY bucket, status ORDER BY bucket"
+
+    async with db.acquire("get_message_timeseries") as conn:
+        rows = await conn.fetch(query, *args)
+
+    series = {}
+    for row in rows:
+        point = series.setdefault(row["bucket"], {"bucket": row["bucket"], "total": 0, "statuses": {}})
+        point["total"] += row["count"]
+        point["statuses"][row["status"]] = row["count"]
+    for point in series.values():
+        # Read and played messages have necessarily been delivered too
+        delivered = sum(count for status, count in point["statuses"].items() if status in _DELIVERED_STATUSES)
+        point["delivered"] = delivered
+        point["delivery_rate"] = round(delivered / point["total"], 4) if point["total"] else 0.0
+    return list(series.values())
 
 async def save_template(template_data: dict):
     """Save template to database"""
-    async with db.acquire() as conn:
-        return await conn.fetchrow(
+    async with db.transaction("save_template") as conn:
+        row = await conn.fetchrow(
             """
             INSERT INTO templates (name, category, language_code, components)
-            VALUES ($1, $2, $3, $4)
+            VALUES (?, ?, ?, ?)
             RETURNING id
             """,
             template_data["name"],
             template_data["category"],
             template_data["language_code"],
-            template_data["components"]
+            json.dumps(template_data["components"])
+        )
+        return row[0]
+
+async def create_campaign(campaign: dict, recipients: List[str]):
+    """Store a campaign row and its recipient list in one transaction"""
+    chunk_size = settings.CAMPAIGN_PAGE_SIZE
+    async with db.transaction("create_campaign") as conn:
+        await conn.execute(
+            """
+            INSERT INTO campaigns (campaign_id, template_name, language_code, content, scheduled_time, total)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            campaign["campaign_id"],
+            campaign["template_name"],
+            campaign["language_code"],
+            json.dumps(campaign["content"], default=str),
+            campaign["scheduled_time"],
+            len(recipients)
+        )
+        for start in range(0, len(recipients), chunk_size):
+            await conn.conn.executemany(
+                "INSERT INTO campaign_recipients (campaign_id, position, recipient) VALUES (?, ?, ?)",
+                [
+                    (campaign["campaign_id"], start + offset, recipient)
+                    for offset, recipient in enumerate(recipients[start:start + chunk_size])
+                ]
+            )
+
+async def get_campaign(campaign_id: str) -> Optional[dict]:
+    async with db.acquire("get_campaign") as conn:
+        row = await conn.fetchrow("SELECT * FROM campaigns WHERE campaign_id = ?", campaign_id)
+    if row is None:
+        return None
+    campaign = dict(row)
+    campaign["content"] = json.loads(campaign["content"])
+    return campaign
+
+async def iter_campaign_recipients(campaign_id: str, after: int = -1) -> AsyncIterator[Tuple[int, str]]:
+    """Yield (position, recipient) past ``after`` page by page in list order"""
+    position = after
+    while True:
+        async with db.acquire("iter_campaign_recipients") as conn:
+            rows = await conn.fetch(
+                """
+                SELECT position, recipient FROM campaign_recipients
+                WHERE campaign_id = ? AND position > ?
+                ORDER BY position
+                LIMIT ?
+                """,
+                campaign_id, position, settings.CAMPAIGN_PAGE_SIZE
+            )
+        if not rows:
+            return
+        for row in rows:
+            yield row["position"], row["recipient"]
+        position = rows[-1]["position"]
+
+async def update_campaign(campaign_id: str, **fields):
+    assignments = ", ".join(f"{column} = ?" for column in fields)
+    await db.writer.submit(
+        f"UPDATE campaigns SET {assignments} WHERE campaign_id = ?",
+        (*fields.values(), campaign_id)
+    )
+
+async def finish_campaign(campaign_id: str, status: str, sent: int, failed: int, checkpoint: int):
+    """Record final counts; the status only changes if nobody cancelled the campaign meanwhile"""
+    await db.writer.submit(
+        """
+        UPDATE campaigns
+        SET status = CASE WHEN status = 'running' THEN ? ELSE status END,
+            sent = ?, failed = ?, checkpoint = ?, completed_at = ?
+        WHERE campaign_id = ?
+        """,
+        (status, sent, failed, checkpoint, datetime.utcnow(), campaign_id)
+    )
+
+async def claim_stalled_campaigns(now: float, stale_before: float) -> List[str]:
+    """Take over running campaigns whose runner stopped sending heartbeats"""
+    async with db.transaction("claim_stalled_campaigns") as conn:
+        rows = await conn.fetch(
+            """
+            UPDATE campaigns SET heartbeat_at = ?
+            WHERE status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)
+            RETURNING campaign_id
+            """,
+            now, stale_before
+        )
+    return [row[0] for row in rows]
+
+_OUTBOX_COLUMNS = ("outbox_id", "platform", "kind", "recipient", "payload", "attempts")
+
+async def enqueue_outbox(entry: dict):
+    """Durably record a send intent; returns once it is committed"""
+    await db.writer.submit(
+        """
+        INSERT INTO outbox (outbox_id, platform, kind, recipient, payload, next_attempt_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        (
+            entry["outbox_id"],
+            entry["platform"],
+            entry["kind"],
+            entry["recipient"],
+            content_codec.encode(entry["payload"]),
+            entry["next_attempt_at"]
+        )
+    )
+
+async def claim_outbox(limit: int, now: float, lease_seconds: float, max_attempts: int) -> List[dict]:
+    """Atomically lease due outbox rows to this process.
+
+    Rows left in 'sending' by a worker that died are reclaimed once their
+    lease runs out, unless they already used up ``max_attempts``; those are
+    dead-lettered instead so a row that keeps killing its sender cannot loop.
+    """
+    async with db.transaction("claim_outbox") as conn:
+        await conn.execute(
+            """
+            INSERT OR REPLACE INTO outbox_dead_letters (
+                outbox_id, platform, kind, recipient, payload, attempts, last_error, created_at
+            )
+            SELECT outbox_id, platform, kind, recipient, payload, attempts,
+                   COALESCE(last_error, 'Lease expired while sending'), created_at
+            FROM outbox
+            WHERE status = 'sending' AND claimed_until < ? AND attempts >= ?
+            """,
+            now, max_attempts
+        )
+        await conn.execute(
+            "DELETE FROM outbox WHERE status = 'sending' AND claimed_until < ? AND attempts >= ?",
+            now, max_attempts
+        )
+        rows = await conn.fetch(
+            f"""
+            UPDATE outbox
+            SET status = 'sending', claimed_until = ?, attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP
+            WHERE outbox_id IN (
+                SELECT outbox_id FROM outbox
+                WHERE (status = 'pending' AND next_attempt_at <= ?)
+                   OR (status = 'sending' AND claimed_until < ?)
+                ORDER BY next_attempt_at
+                LIMIT ?
+            )
+            RETURNING {", ".join(_OUTBOX_COLUMNS)}
+            """,
+            now + lease_seconds, now, now, limit
         )
+    entries = []
+    for row in rows:
+        entry = dict(zip(_OUTBOX_COLUMNS, row))
+        entry["payload"] = content_codec.decode(entry["payload"])
+        entries.append(entry)
+    return entries
+
+async def complete_outbox(outbox_id: str, message_id: Optional[str]):
+    await db.writer.submit(
+        """
+        UPDATE outbox
+        SET status = 'sent', message_id = ?, claimed_until = NULL, last_error = NULL, updated_at = CURRENT_TIMESTAMP
+        WHERE outbox_id = ?
+        """,
+        (message_id, outbox_id),
+        wait=False
+    )
+
+async def retry_outbox(outbox_id: str, error: str, next_attempt_at: float):
+    await db.writer.submit(
+        """
+        UPDATE outbox
+        SET status = 'pending', next_attempt_at = ?, claimed_until = NULL, last_error = ?, updated_at = CURRENT_TIMESTAMP
+        WHERE outbox_id = ?
+        """,
+        (next_attempt_at, error, outbox_id),
+        wait=False
+    )
+
+async def dead_letter_outbox(outbox_id: str, error: str):
+    """Move an exhausted outbox row to the dead-letter table"""
+    async with db.transaction("dead_letter_outbox") as conn:
+        await conn.execute(
+            """
+            INSERT OR REPLACE INTO outbox_dead_letters (
+                outbox_id, platform, kind, recipient, payload, attempts, last_error, created_at
+            )
+            SELECT outbox_id, platform, kind, recipient, payload, attempts, ?, created_at
+            FROM outbox WHERE outbox_id = ?
+            """,
+            error, outbox_id
+        )
+        await conn.execute("DELETE FROM outbox WHERE outbox_id = ?", outbox_id)
+
+async def requeue_dead_letter(outbox_id: str, now: float) -> bool:
+    """Move a dead letter back into the outbox with a fresh attempt budget"""
+    async with db.transaction("requeue_dead_letter") as conn:
+        cursor = await conn.execute(
+            """
+            INSERT INTO outbox (outbox_id, platform, kind, recipient, payload, next_attempt_at, last_error, created_at)
+            SELECT outbox_id, platform, kind, recipient, payload, ?, last_error, created_at
+            FROM outbox_dead_letters WHERE outbox_id = ?
+            """,
+            now, outbox_id
+        )
+        if cursor.rowcount == 0:
+            return False
+        await conn.execute("DELETE FROM outbox_dead_letters WHERE outbox_id = ?", outbox_id)
+        return True
+
+async def get_outbox_entry(outbox_id: str) -> Optional[dict]:
+    async with db.acquire("get_outbox_entry") as conn:
+        row = await conn.fetchrow(
+            """
+            SELECT outbox_id, platform, kind, recipient, status, attempts, message_id, last_error,
+                   created_at, updated_at, NULL AS failed_at
+            FROM outbox WHERE outbox_id = ?
+            UNION ALL
+            SELECT outbox_id, platform, kind, recipient, 'dead', attempts, NULL, last_error,
+                   created_at, NULL, failed_at
+            FROM outbox_dead_letters WHERE outbox_id = ?
+            """,
+            outbox_id, outbox_id
+        )
+    return dict(row) if row is not None else None
+
+async def list_dead_letters(limit: int = 100) -> List[dict]:
+    async with db.acquire("list_dead_letters") as conn:
+        rows = await conn.fetch(
+            """
+            SELECT outbox_id, platform, kind, recipient, payload, attempts, last_error, created_at, failed_at
+            FROM outbox_dead_letters
+            ORDER BY failed_at DESC
+            LIMIT ?
+            """,
+            limit
+        )
+    letters = []
+    for row in rows:
+        letter = dict(row)
+        letter["payload"] = content_codec.decode(letter["payload"])
+        letters.append(letter)
+    return letters
+
+async def get_outbox_counts() -> dict:
+    async with db.acquire("get_outbox_counts") as conn:
+        rows = await conn.fetch("SELECT status, COUNT(*) FROM outbox GROUP BY status")
+        dead = await conn.fetchval("SELECT COUNT(*) FROM outbox_dead_letters")
+    counts = {row[0]: row[1] for row in rows}
+    counts["dead"] = dead
+    return counts
+
+async def prune_outbox(retention_hours: int):
+    await db.writer.submit(
+        "DELETE FROM outbox WHERE status = 'sent' AND updated_at < datetime('now', ?)",
+        (f"-{retention_hours} hours",),
+        wait=False
+    )
+
+async def acquire_lease(name: str, holder: str, ttl: float) -> bool:
+    """Take or renew a named lease shared by all processes on this database"""
+    now = time.time()
+    async with db.transaction("acquire_lease") as conn:
+        await conn.execute(
+            """
+            INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT (name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+            WHERE leases.holder = excluded.holder OR leases.expires_at < ?
+            """,
+            name, holder, now + ttl, now
+        )
+        current = await conn.fetchval("SELECT holder FROM leases WHERE name = ?", name)
+    return current == holder
+
+async def release_lease(name: str, holder: str):
+    async with db.transaction("release_lease") as conn:
+        await conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", name, holder)
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+class PoolTimeoutError(TimeoutError):
+    pass
+
+class PooledConnection:
+    """Connection handle with asyncpg-style query helpers"""
+
+    def __init__(self, conn: aiosqlite.Connection):
+        self.conn = conn
+
+    async def execute(self, sql: str, *args) -> aiosqlite.Cursor:
+        return await self.conn.execute(sql, args)
+
+    async def fetch(self, sql: str, *args) -> List[sqlite3.Row]:
+        async with self.conn.execute(sql, args) as cur:
+            return await cur.fetchall()
+
+    async def fetchrow(self, sql: str, *args) -> Optional[sqlite3.Row]:
+        async with self.conn.execute(sql, args) as cur:
+            return await cur.fetchone()
+
+    async def fetchval(self, sql: str, *args) -> Any:
+        row = await self.fetchrow(sql, *args)
+        return row[0] if row is not None else None
+
+class ConnectionPool:
+    """Bounded pool of read connections.
+
+    ``min_size`` connections are opened up front and more are added on demand
+    up to ``max_size``. When all are busy, ``acquire`` waits up to ``timeout``
+    seconds for one to be released.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Awaitable[aiosqlite.Connection]],
+        min_size: int,
+        max_size: int,
+        timeout: float
+    ):
+        self._connect = connect
+        self.min_size = max(min(min_size, max_size), 0)
+        self.max_size = max(max_size, 1)
+        self.timeout = timeout
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+        self.acquired = 0
+        self.timeouts = 0
+        self._wait_time = 0.0
+
+    async def open(self):
+        self._closed = False
+        for _ in range(self.min_size - self._size):
+            self._size += 1
+            try:
+                self._idle.put_nowait(await self._connect())
+            except Exception:
+                self._size -= 1
+                raise
+        logger.info(f"Opened database read pool with {self._size} connections (max {self.max_size})")
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[PooledConnection]:
+        conn = await self._get()
+        try:
+            yield PooledConnection(conn)
+        finally:
+            await self._release(conn)
+
+    async def _get(self) -> aiosqlite.Connection:
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        start = time.monotonic()
+        try:
+            try:
+                return self._idle.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+
+            if self._size < self.max_size:
+                self._size += 1
+                try:
+                    return await self._connect()
+                except Exception:
+                    self._size -= 1
+                    raise
+
+            self._waiting += 1
+            try:
+                return await asyncio.wait_for(self._idle.get(), self.timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise PoolTimeoutError(f"Timed out after {self.timeout}s waiting for a database connection")
+            finally:
+                self._waiting -= 1
+        finally:
+            self.acquired += 1
+            self._wait_time += time.monotonic() - start
+
+    async def _release(self, conn: aiosqlite.Connection):
+        if self._closed:
+            self._size -= 1
+            await conn.close()
+            return
+        if conn.in_transaction:
+            await conn.rollback()
+        self._idle.put_nowait(conn)
+
+    async def close(self):
+        self._closed = True
+        while not self._idle.empty():
+            conn = self._idle.get_nowait()
+            self._size -= 1
+            await conn.close()
+
+    async def check_health(self) -> bool:
+        try:
+            async with self.acquire() as conn:
+                return await conn.fetchval("SELECT 1") == 1
+        except Exception as e:
+            logger.error(f"Database pool health check failed: {e}")
+            return False
+
+    def stats(self) -> dict:
+        idle = self._idle.qsize()
+        in_use = self._size - idle
+        return {
+            "size": self._size,
+            "idle": idle,
+            "in_use": in_use,
+            "waiting": self._waiting,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "utilization": round(in_use / self.max_size, 3),
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self._wait_time / self.acquired * 1000, 3) if self.acquired else 0.0
+        }
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from itertools import groupby
+from typing import Any, Callable, List, Optional, Sequence
+from app.core.config import settings
+from app.utils.metrics import db_commit_latency, db_commit_size
+
+logger = logging.getLogger(__name__)
+
+class _Write:
+    __slots__ = ("sql", "params", "future")
+
+    def __init__(self, sql: Optional[str], params: Sequence[Any], future: Optional[asyncio.Future]):
+        self.sql = sql
+        self.params = params
+        self.future = future
+
+_STOP = _Write(None, (), None)
+
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+def _fail_pending(batch: List[_Write], error: Exception):
+    for write in batch:
+        if write.future is not None and not write.future.done():
+            write.future.set_exception(error)
+
+class MessageWriter:
+    """Background group-commit writer.
+
+    Writes are queued and applied by a single task, which collects up to
+    DB_WRITE_BATCH_SIZE statements or waits DB_WRITE_FLUSH_INTERVAL_MS,
+    whichever comes first, and commits them in one transaction using
+    ``executemany`` for runs of the same statement.
+    """
+
+    def __init__(
+        self,
+        get_connection: Callable[[], Any],
+        lock: Optional[asyncio.Lock] = None,
+        batch_size: int = None,
+        flush_interval_ms: int = None
+    ):
+        self._get_connection = get_connection
+        self._lock = lock or asyncio.Lock()
+        self.batch_size = batch_size or settings.DB_WRITE_BATCH_SIZE
+        self.flush_interval = (flush_interval_ms or settings.DB_WRITE_FLUSH_INTERVAL_MS) / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.committed = 0
+        self.batches = 0
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=settings.DB_WRITE_QUEUE_SIZE)
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, sql: str, params: Sequence[Any], wait: bool = True):
+        """Queue a write; with ``wait`` return only once it is committed"""
+        if self._task is None:
+            raise RuntimeError("Message writer is not running")
+        future = asyncio.get_running_loop().create_future() if wait else None
+        await self._queue.put(_Write(sql, params, future))
+        if future is not None:
+            await future
+
+    async def flush(self):
+        """Commit everything queued so far"""
+        if self._task is None:
+            return
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Write(None, (), future))
+        await future
+
+    async def stop(self):
+        """Flush pending writes and stop the background task"""
+        if self._task is None:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        logger.info(f"Message writer stopped after {self.committed} writes in {self.batches} batches")
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            if batch[0] is not _STOP and batch[0].sql is not None:
+                await self._collect(batch)
+            stop = any(write is _STOP for write in batch)
+            async with self._lock:
+                try:
+                    await self._commit([write for write in batch if write is not _STOP])
+                except Exception as e:
+                    # The writer must survive, or every later submit() would hang
+                    logger.error(f"Write batch failed unexpectedly: {e}", exc_info=True)
+                    _fail_pending(batch, e)
+            if stop:
+                return
+
+    async def _collect(self, batch: List[_Write]):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                write = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    return
+                try:
+                    write = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    return
+            batch.append(write)
+            # A flush marker or shutdown commits immediately
+            if write is _STOP or write.sql is None:
+                return
+
+    async def _commit(self, batch: List[_Write]):
+        writes = [write for write in batch if write.sql is not None]
+        conn = self._get_connection()
+        try:
+            if writes:
+                await self._apply(conn, writes)
+                self.committed += len(writes)
+                self.batches += 1
+        except sqlite3.IntegrityError as e:
+            await conn.rollback()
+            logger.warning(f"Batch of {len(writes)} writes failed ({e}), retrying individually")
+            await self._commit_individually(batch)
+            return
+        except Exception as e:
+            await conn.rollback()
+            logger.error(f"Failed to commit batch of {len(writes)} writes: {e}")
+            _fail_pending(batch, e)
+            return
+
+        for write in batch:
+            if write.future is not None and not write.future.done():
+                write.future.set_result(True)
+
+    async def _apply(self, conn, writes: List[_Write]):
+        """Run and commit the writes, retrying while another process holds the lock"""
+        for attempt in range(settings.DB_WRITE_RETRIES + 1):
+            start = time.perf_counter()
+            try:
+                for sql, group in groupby(writes, key=lambda write: write.sql):
+                    await conn.executemany(sql, [write.params for write in group])
+                await conn.commit()
+            except sqlite3.OperationalError as e:
+                await conn.rollback()
+                if attempt == settings.DB_WRITE_RETRIES or not _is_busy(e):
+                    raise
+                delay = settings.DB_WRITE_RETRY_BACKOFF_MS / 1000 * 2 ** attempt
+                logger.warning(f"Database busy committing {len(writes)} writes ({e}), retrying in {delay * 1000:.0f} ms")
+                await asyncio.sleep(delay)
+                continue
+            db_commit_latency.labels("writer").observe(time.perf_counter() - start)
+            db_commit_size.labels("writer").observe(len(writes))
+            return
+
+    async def _commit_individually(self, batch: List[_Write]):
+        conn = self._get_connection()
+        for write in batch:
+            error = None
+            if write.sql is not None:
+                try:
+                    await conn.execute(write.sql, write.params)
+                    await conn.commit()
+                    self.committed += 1
+                except Exception as e:
+                    await conn.rollback()
+                    error = e
+            if write.future is None or write.future.done():
+                if error is not None:
+                    logger.error(f"Dropped write after commit failure: {error}")
+                continue
+            if error is not None:
+                write.future.set_exception(error)
+            else:
+                write.future.set_result(True)
@@ -0,0 +1,94 @@
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Iterable, List, Optional, Set
+from app.core.config import settings
+
+class EventDeduplicator:
+    """Remembers event keys so redelivered events are processed once.
+
+    Recent keys live in a bounded, time-limited in-memory LRU, so a retry
+    costs a dict lookup. Keys that fell out of memory can optionally be
+    checked against a persistent seen-set through the ``find_seen`` and
+    ``mark_seen`` callables.
+
+    ``filter_new`` only reserves new keys in memory. Callers ``commit`` them
+    once the events are stored, or ``release`` them if storing failed so a
+    redelivery is processed instead of dropped.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl: Optional[float] = None,
+        find_seen: Optional[Callable[[List[str]], Awaitable[Set[str]]]] = None,
+        mark_seen: Optional[Callable[[List[str]], Awaitable[None]]] = None
+    ):
+        self.max_entries = max_entries or settings.WEBHOOK_DEDUP_MAX_ENTRIES
+        self.ttl = ttl if ttl is not None else settings.WEBHOOK_DEDUP_TTL_SECONDS
+        self._find_seen = find_seen
+        self._mark_seen = mark_seen
+        # key -> expiry; insertion order is expiry order
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def filter_new(self, keys: Iterable[str]) -> Set[str]:
+        """Return the keys not seen before and reserve them in memory"""
+        now = time.monotonic()
+        self._expire(now)
+
+        candidates = []
+        for key in dict.fromkeys(keys):
+            if key in self._entries:
+                self.hits += 1
+            else:
+                candidates.append(key)
+                # Remember before awaiting the store so concurrent callers
+                # treat the same key as a duplicate
+                self._remember(key, now)
+
+        if candidates and self._find_seen is not None:
+            seen = await self._find_seen(candidates)
+            self.store_hits += len(seen)
+            new = [key for key in candidates if key not in seen]
+        else:
+            new = candidates
+
+        self.misses += len(new)
+        return set(new)
+
+    async def commit(self, keys: Iterable[str]):
+        """Record keys whose events were stored in the persistent seen-set"""
+        keys = list(keys)
+        if keys and self._mark_seen is not None:
+            await self._mark_seen(keys)
+
+    def release(self, keys: Iterable[str]):
+        """Forget reserved keys whose events could not be stored"""
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses
+        }
+
+    def _remember(self, key: str, now: float):
+        self._entries[key] = now + self.ttl
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _expire(self, now: float):
+        while self._entries:
+            key, expiry = next(iter(self._entries.items()))
+            if expiry > now:
+                return
+            del self._entries[key]
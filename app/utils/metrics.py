@@ -1,12 +1,75 @@
-from prometheus_client import Counter, Histogram
-from functools import lru_cache
-
-@lru_cache()
-def get_metrics():
-    """Get or create metrics singleton to avoid duplicate registration"""
-    return {
-        'whatsapp_requests': Counter('whatsapp_requests_total', 'Total WhatsApp API requests'),
-        'whatsapp_latency': Histogram('whatsapp_request_latency_seconds', 'WhatsApp API latency'),
-        'instagram_requests': Counter('instagram_requests_total', 'Total Instagram API requests'),
-        'instagram_latency': Histogram('instagram_request_latency_seconds', 'Instagram API latency')
-    }
\ No newline at end of file
+from prometheus_client import Counter, Gauge, Histogram
+
+# Every application metric is defined here, once, on the default registry
+# that /metrics exposes. Import the objects instead of creating new ones.
+
+# Graph API
+
+graph_request_latency = Histogram(
+    "graph_request_duration_seconds",
+    "Graph API request latency",
+    ["endpoint", "outcome"],
+    buckets=(0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+graph_errors = Counter(
+    "graph_api_errors_total",
+    "Graph API error responses by Meta error code",
+    ["endpoint", "code"]
+)
+circuit_state = Gauge(
+    "graph_circuit_state",
+    "Graph API circuit breaker state (0 closed, 1 half-open, 2 open)",
+    ["endpoint", "account"]
+)
+
+# Batch sends
+
+batch_size = Histogram(
+    "batch_size",
+    "Items dispatched per batch",
+    ["kind"],
+    buckets=(1, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000)
+)
+batch_duration = Histogram(
+    "batch_duration_seconds",
+    "Wall time to dispatch a whole batch",
+    ["kind"],
+    buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 300, 900, 3600)
+)
+
+# Queues, sampled when /metrics is scraped
+
+queue_depth = Gauge(
+    "queue_depth",
+    "Items waiting in an in-process queue",
+    ["queue"]
+)
+
+# Database
+
+db_query_latency = Histogram(
+    "db_query_duration_seconds",
+    "Database read latency, including the wait for a pooled connection",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+)
+db_commit_latency = Histogram(
+    "db_commit_duration_seconds",
+    "Database write transaction latency",
+    ["source"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+)
+db_commit_size = Histogram(
+    "db_commit_statements",
+    "Statements applied per group commit",
+    ["source"],
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000)
+)
+
+# Scheduler
+
+scheduler_jobs = Gauge(
+    "scheduler_jobs",
+    "Stored scheduler jobs; overdue ones are past their run time",
+    ["state"]
+)
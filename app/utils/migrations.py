@@ -0,0 +1,284 @@
+import logging
+from typing import List, Tuple
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+def _counter_upsert(row: str, delta: int) -> str:
+    """Trigger statement adding ``delta`` to the counter of ``row`` (NEW or OLD)"""
+    return f"""
+            INSERT INTO message_counters (platform, status, count)
+            VALUES (COALESCE({row}.platform, 'unknown'), COALESCE({row}.status, 'sent'), {delta})
+            ON CONFLICT (platform, status) DO UPDATE SET count = count + excluded.count;"""
+
+def _rollup_upsert(row: str, delta: int) -> str:
+    """Trigger statement adding ``delta`` to the minute/hour/day buckets of ``row``"""
+    return f"""
+            INSERT INTO message_rollups (granularity, bucket, platform, template_name, status, count)
+            SELECT granularity, bucket, COALESCE({row}.platform, 'unknown'),
+                   COALESCE({row}.template_name, ''), COALESCE({row}.status, 'sent'), {delta}
+            FROM (
+                SELECT 'minute' AS granularity, strftime('%Y-%m-%d %H:%M', {row}.created_at) AS bucket
+                UNION ALL SELECT 'hour', strftime('%Y-%m-%d %H:00', {row}.created_at)
+                UNION ALL SELECT 'day', strftime('%Y-%m-%d', {row}.created_at)
+            )
+            WHERE true
+            ON CONFLICT (granularity, bucket, platform, template_name, status)
+            DO UPDATE SET count = count + excluded.count;"""
+
+# (version, description, statements). The schema version is kept in
+# PRAGMA user_version; append new migrations, never edit applied ones.
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (1, "create messages table", [
+        """
+        CREATE TABLE IF NOT EXISTS messages (
+            message_id TEXT PRIMARY KEY,
+            recipient TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            status TEXT DEFAULT 'sent'
+        )
+        """
+    ]),
+    (2, "add structured message columns", [
+        "ALTER TABLE messages ADD COLUMN platform TEXT",
+        "ALTER TABLE messages ADD COLUMN direction TEXT",
+        "ALTER TABLE messages ADD COLUMN template_name TEXT",
+        "ALTER TABLE messages ADD COLUMN message_type TEXT"
+    ]),
+    (3, "backfill structured columns from JSON content", [
+        """
+        UPDATE messages SET
+            platform = COALESCE(json_extract(content, '$.platform'), 'whatsapp'),
+            direction = COALESCE(json_extract(content, '$.direction'), 'outbound'),
+            template_name = json_extract(content, '$.template_name'),
+            message_type = CASE
+                WHEN json_extract(content, '$.template_name') IS NOT NULL THEN 'template'
+                WHEN json_extract(content, '$.media_url') IS NOT NULL THEN 'media'
+                ELSE 'text'
+            END
+        WHERE platform IS NULL AND json_valid(content)
+        """,
+        """
+        UPDATE messages SET platform = 'whatsapp', direction = 'outbound', message_type = 'text'
+        WHERE platform IS NULL
+        """
+    ]),
+    (4, "add hot-path message indexes", [
+        "CREATE INDEX IF NOT EXISTS idx_messages_recipient_created ON messages (recipient, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_platform_status ON messages (platform, status)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_created ON messages (created_at)"
+    ]),
+    (5, "create templates table", [
+        """
+        CREATE TABLE IF NOT EXISTS templates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            category TEXT,
+            language_code TEXT NOT NULL,
+            components TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_templates_name_language ON templates (name, language_code)"
+    ]),
+    (6, "add incrementally maintained message counters and rollups", [
+        """
+        CREATE TABLE IF NOT EXISTS message_counters (
+            platform TEXT NOT NULL,
+            status TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (platform, status)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS message_rollups (
+            granularity TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            platform TEXT NOT NULL,
+            template_name TEXT NOT NULL,
+            status TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (granularity, bucket, platform, template_name, status)
+        ) WITHOUT ROWID
+        """,
+        """
+        INSERT INTO message_counters (platform, status, count)
+        SELECT COALESCE(platform, 'unknown'), COALESCE(status, 'sent'), COUNT(*)
+        FROM messages GROUP BY 1, 2
+        """,
+        """
+        INSERT INTO message_rollups (granularity, bucket, platform, template_name, status, count)
+        SELECT granularity, bucket, platform, template_name, status, COUNT(*)
+        FROM (
+            SELECT 'minute' AS granularity, strftime('%Y-%m-%d %H:%M', created_at) AS bucket,
+                   COALESCE(platform, 'unknown') AS platform, COALESCE(template_name, '') AS template_name,
+                   COALESCE(status, 'sent') AS status
+            FROM messages
+            UNION ALL
+            SELECT 'hour', strftime('%Y-%m-%d %H:00', created_at), COALESCE(platform, 'unknown'),
+                   COALESCE(template_name, ''), COALESCE(status, 'sent')
+            FROM messages
+            UNION ALL
+            SELECT 'day', strftime('%Y-%m-%d', created_at), COALESCE(platform, 'unknown'),
+                   COALESCE(template_name, ''), COALESCE(status, 'sent')
+            FROM messages
+        )
+        GROUP BY granularity, bucket, platform, template_name, status
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_messages_rollup_insert AFTER INSERT ON messages
+        BEGIN{_counter_upsert("NEW", 1)}{_rollup_upsert("NEW", 1)}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_messages_rollup_update
+        AFTER UPDATE OF status, platform, template_name, created_at ON messages
+        WHEN OLD.status IS NOT NEW.status
+            OR OLD.platform IS NOT NEW.platform
+            OR OLD.template_name IS NOT NEW.template_name
+            OR OLD.created_at IS NOT NEW.created_at
+        BEGIN{_counter_upsert("OLD", -1)}{_rollup_upsert("OLD", -1)}{_counter_upsert("NEW", 1)}{_rollup_upsert("NEW", 1)}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_messages_rollup_delete AFTER DELETE ON messages
+        BEGIN{_counter_upsert("OLD", -1)}{_rollup_upsert("OLD", -1)}
+        END
+        """
+    ]),
+    (7, "create campaign tables", [
+        """
+        CREATE TABLE IF NOT EXISTS campaigns (
+            campaign_id TEXT PRIMARY KEY,
+            template_name TEXT NOT NULL,
+            language_code TEXT NOT NULL,
+            content TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'scheduled',
+            scheduled_time TIMESTAMP,
+            job_id TEXT,
+            total INTEGER NOT NULL DEFAULT 0,
+            sent INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            completed_at TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS campaign_recipients (
+            campaign_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            recipient TEXT NOT NULL,
+            PRIMARY KEY (campaign_id, position)
+        ) WITHOUT ROWID
+        """
+    ]),
+    (8, "create inbound messages table", [
+        """
+        CREATE TABLE IF NOT EXISTS inbound_messages (
+            message_id TEXT PRIMARY KEY,
+            contact TEXT NOT NULL,
+            phone_number_id TEXT,
+            contact_name TEXT,
+            message_type TEXT,
+            body TEXT,
+            payload BLOB NOT NULL,
+            timestamp INTEGER NOT NULL,
+            received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_inbound_contact_timestamp ON inbound_messages (contact, timestamp)"
+    ]),
+    (9, "create webhook seen-set", [
+        """
+        CREATE TABLE IF NOT EXISTS webhook_events (
+            event_key TEXT PRIMARY KEY,
+            seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_webhook_events_seen ON webhook_events (seen_at)"
+    ]),
+    (10, "create outbox and dead-letter tables", [
+        """
+        CREATE TABLE IF NOT EXISTS outbox (
+            outbox_id TEXT PRIMARY KEY,
+            platform TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            recipient TEXT NOT NULL,
+            payload BLOB NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            claimed_until REAL,
+            message_id TEXT,
+            last_error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at)",
+        """
+        CREATE TABLE IF NOT EXISTS outbox_dead_letters (
+            outbox_id TEXT PRIMARY KEY,
+            platform TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            recipient TEXT NOT NULL,
+            payload BLOB NOT NULL,
+            attempts INTEGER NOT NULL,
+            last_error TEXT,
+            created_at TIMESTAMP,
+            failed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    ]),
+    (11, "create leases table", [
+        """
+        CREATE TABLE IF NOT EXISTS leases (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        ) WITHOUT ROWID
+        """
+    ]),
+    (12, "track campaign checkpoints and heartbeats", [
+        "ALTER TABLE campaigns ADD COLUMN checkpoint INTEGER NOT NULL DEFAULT -1",
+        "ALTER TABLE campaigns ADD COLUMN heartbeat_at REAL"
+    ]),
+]
+
+async def get_schema_version(conn: aiosqlite.Connection) -> int:
+    async with conn.execute("PRAGMA user_version") as cur:
+        row = await cur.fetchone()
+        return row[0]
+
+async def run_migrations(conn: aiosqlite.Connection) -> int:
+    """Apply pending migrations in order, each in its own transaction.
+
+    Each transaction takes the write lock up front (BEGIN IMMEDIATE) and
+    re-reads the version inside it, so workers starting together against the
+    same file apply every migration exactly once.
+    """
+    current = await get_schema_version(conn)
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            await conn.execute("BEGIN IMMEDIATE")
+            current = await get_schema_version(conn)
+            if version <= current:
+                # Another process applied it while we waited for the lock
+                await conn.rollback()
+                continue
+            for statement in statements:
+                await conn.execute(statement)
+            await conn.execute(f"PRAGMA user_version = {version}")
+            await conn.commit()
+        except Exception as e:
+            await conn.rollback()
+            logger.error(f"Migration {version} ({description}) failed: {e}")
+            raise
+        current = version
+        logger.info(f"Applied migration {version}: {description}")
+    return current
@@ -1,14 +1,130 @@
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+from app.core.config import settings
 
-import phonenumbers
-from typing import Tuple
+def validate_phone_number(phone: str, default_region: Optional[str] = None) -> Tuple[bool, str]:
+    cached = _cache.get((phone, default_region))
+    if cached is not None:
+        return cached
+    result = _validate(phone, default_region)
+    _cache.put((phone, default_region), result)
+    return result
 
-def validate_phone_number(phone: str) -> Tuple[bool, str]:
+def _validate(phone: str, default_region: Optional[str] = None) -> Tuple[bool, str]:
+    # Imported on first use to keep application startup light
+    import phonenumbers
     try:
-        number = phonenumbers.parse(phone)
+        number = phonenumbers.parse(phone, default_region)
         if phonenumbers.is_valid_number(number):
             # Format to E.164 format
             formatted = phonenumbers.format_number(number, phonenumbers.PhoneNumberFormat.E164)
             return True, formatted
         return False, "Invalid phone number"
     except Exception as e:
-        return False, str(e)
\ No newline at end of file
+        return False, str(e)
+
+def _validate_chunk(phones: List[str], default_region: Optional[str]) -> List[Tuple[bool, str]]:
+    return [_validate(phone, default_region) for phone in phones]
+
+class _ValidationCache:
+    """Thread-safe bounded LRU of raw number -> validation result"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Optional[Tuple[bool, str]]:
+        with self._lock:
+            result = self._data.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result: Tuple[bool, str]):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = result
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def info(self) -> dict:
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+_cache = _ValidationCache(settings.PHONE_VALIDATION_CACHE_SIZE)
+
+# Created on the first large batch and reused until shutdown_process_pool()
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _process_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned workers do not inherit the event loop, its threads or
+            # open sockets the way forked ones would
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PHONE_VALIDATION_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+def shutdown_process_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+def validate_phone_numbers(
+    phones: Iterable[str],
+    default_region: Optional[str] = None
+) -> List[Tuple[bool, str]]:
+    """Validate many numbers, returning results in input order.
+
+    Cached numbers are answered from the LRU. When more than
+    PHONE_VALIDATION_PROCESS_THRESHOLD numbers miss the cache they are split
+    across the shared process pool, otherwise they are validated in this
+    process.
+    """
+    phones = [str(phone) for phone in phones]
+    results: List[Optional[Tuple[bool, str]]] = [None] * len(phones)
+    misses = {}
+    for index, phone in enumerate(phones):
+        cached = _cache.get((phone, default_region))
+        if cached is not None:
+            results[index] = cached
+        else:
+            misses.setdefault(phone, []).append(index)
+
+    unique = list(misses)
+    if len(unique) > settings.PHONE_VALIDATION_PROCESS_THRESHOLD:
+        chunk_size = settings.PHONE_VALIDATION_CHUNK_SIZE
+        chunks = [unique[i:i + chunk_size] for i in range(0, len(unique), chunk_size)]
+        validated = [
+            result
+            for chunk_results in _process_pool().map(_validate_chunk, chunks, [default_region] * len(chunks))
+            for result in chunk_results
+        ]
+    else:
+        validated = _validate_chunk(unique, default_region)
+
+    for phone, result in zip(unique, validated):
+        _cache.put((phone, default_region), result)
+        for index in misses[phone]:
+            results[index] = result
+    return results
+
+def validation_cache_info() -> dict:
+    return _cache.info()
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+from app.core.config import settings
+from app.utils.metrics import db_commit_latency, db_commit_size
+
+logger = logging.getLogger(__name__)
+
+# Delivery statuses only move forward; "failed" is terminal
+STATUS_RANK = {
+    "sent": 1,
+    "delivered": 2,
+    "read": 3,
+    "played": 4,
+    "failed": 5
+}
+
+def status_rank(status: str) -> int:
+    return STATUS_RANK.get(status, 0)
+
+_RANK_CASE = "CASE status {} ELSE 0 END".format(
+    " ".join(f"WHEN '{status}' THEN {rank}" for status, rank in STATUS_RANK.items())
+)
+
+# The CASE guard keeps a late, lower-ranked status from overwriting the
+# stored one even if it was flushed in an earlier window.
+_UPDATE_STATUS_SQL = f"""
+    UPDATE messages
+    SET status = ?, updated_at = CURRENT_TIMESTAMP
+    WHERE message_id = ? AND {_RANK_CASE} < ?
+"""
+
+class StatusCoalescer:
+    """Collapses delivery-status updates before they reach the database.
+
+    Only the highest-ranked status per message_id is kept within a window of
+    STATUS_FLUSH_INTERVAL_MS (or until STATUS_BATCH_SIZE messages are
+    pending), then the window is applied with one ``executemany``.
+    """
+
+    def __init__(
+        self,
+        get_connection: Callable[[], Any],
+        lock: Optional[asyncio.Lock] = None,
+        before_flush: Optional[Callable[[], Any]] = None,
+        batch_size: int = None,
+        flush_interval_ms: int = None
+    ):
+        self._get_connection = get_connection
+        self._lock = lock or asyncio.Lock()
+        self._before_flush = before_flush
+        self.batch_size = batch_size or settings.STATUS_BATCH_SIZE
+        self.flush_interval = (flush_interval_ms or settings.STATUS_FLUSH_INTERVAL_MS) / 1000
+        self._pending: Dict[str, str] = {}
+        self._flushed: Optional[asyncio.Future] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.received = 0
+        self.applied = 0
+        self.flushes = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def update(self, message_id: str, status: str, wait: bool = True):
+        """Record a status; with ``wait`` return once its window is committed"""
+        if self._task is None or self._task.done():
+            raise RuntimeError("Status coalescer is not running")
+        self.received += 1
+        current = self._pending.get(message_id)
+        if current is None or status_rank(status) > status_rank(current):
+            self._pending[message_id] = status
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        if self._flushed is None:
+            self._flushed = asyncio.get_running_loop().create_future()
+        if wait:
+            await asyncio.shield(self._flushed)
+
+    async def stop(self):
+        """Apply pending updates and stop the background task"""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        logger.info(f"Status coalescer stopped: {self.received} updates applied as {self.applied} row writes")
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self._flush()
+            if self._stopping:
+                # Updates submitted while the last window was committing
+                while self._pending:
+                    await self._flush()
+                return
+
+    async def _flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        flushed, self._flushed = self._flushed, None
+        try:
+            # Let queued message inserts land first so their statuses apply
+            if self._before_flush is not None:
+                await self._before_flush()
+            async with self._lock:
+                conn = self._get_connection()
+                start = time.perf_counter()
+                try:
+                    cursor = await conn.executemany(
+                        _UPDATE_STATUS_SQL,
+                        [(status, message_id, status_rank(status)) for message_id, status in pending.items()]
+                    )
+                    await conn.commit()
+                    db_commit_latency.labels("status").observe(time.perf_counter() - start)
+                    db_commit_size.labels("status").observe(len(pending))
+                except Exception:
+                    await conn.rollback()
+                    raise
+            self.applied += max(cursor.rowcount, 0)
+            self.flushes += 1
+        except Exception as e:
+            logger.error(f"Failed to apply {len(pending)} status updates: {e}")
+            if flushed is not None and not flushed.done():
+                flushed.set_exception(e)
+                # Waiters observe the error; no one may be waiting at all
+                flushed.exception()
+            return
+        if flushed is not None and not flushed.done():
+            flushed.set_result(True)
@@ -0,0 +1,285 @@
+"""Offline load test of the main API paths against a local Graph stand-in.
+
+Starts benchmarks/mock_graph.py and the application (one uvicorn process,
+fresh temporary databases, GRAPH_API_BASE_URL pointed at the mock), then
+drives each scenario with --concurrency clients for --duration seconds and
+reports requests per second, p50/p95/p99 latency, errors and the server's
+resident memory.
+
+    python benchmarks/load_test.py [--scenarios send,batch_template,...]
+                                   [--duration 10] [--concurrency 32] [--batch-size 100]
+                                   [--save results.json] [--baseline results.json]
+
+With --baseline the run fails (exit status 1) if any scenario's RPS drops,
+or its p99 grows, by more than --max-regression compared to the saved run.
+The mock's latency, error rate and rate limit are set with the same flags as
+mock_graph.py. The rate governor is opened up so it does not cap throughput
+unless --governed is passed.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import io
+import itertools
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import httpx
+import jwt
+from app.core.config import settings
+from benchmarks.mock_graph import add_arguments
+
+AREA_CODES = ("415", "202", "312", "617", "206")
+
+def recipients(start: int, count: int) -> List[str]:
+    # Valid US numbers in the 555 exchange, distinct for the first 50000
+    return [f"+1{AREA_CODES[i // 10000 % len(AREA_CODES)]}555{i % 10000:04d}" for i in range(start, start + count)]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def rss_mb(pid: int) -> Dict[str, Optional[float]]:
+    """Current and peak resident memory of a process, from /proc (Linux only)"""
+    usage = {"rss_mb": None, "peak_rss_mb": None}
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    usage["rss_mb"] = round(int(line.split()[1]) / 1024, 1)
+                elif line.startswith("VmHWM:"):
+                    usage["peak_rss_mb"] = round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return usage
+
+async def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{process.args[-1]} exited with status {process.returncode}")
+            try:
+                await client.get(url, timeout=0.5)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.05)
+    raise RuntimeError(f"{url} did not answer within {timeout:.0f}s")
+
+class Scenarios:
+    """Request builders, one per scenario; each returns the kwargs of one call"""
+
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+        self._sequence = itertools.count()
+
+    def send(self) -> dict:
+        return {"method": "POST", "url": "/api/whatsapp/send", "json": {
+            "recipient": recipients(next(self._sequence), 1)[0],
+            "message": "Load test message",
+            "scheduled_time": datetime.now(timezone.utc).isoformat()
+        }}
+
+    def batch_template(self) -> dict:
+        return {"method": "POST", "url": "/api/whatsapp/batch/template", "json": {
+            "template_name": "bench_template",
+            "recipients": recipients(next(self._sequence) * self.batch_size, self.batch_size),
+            "content": {"body": "Hello from the load test"}
+        }}
+
+    def batch_csv(self) -> dict:
+        rows = "\n".join(recipients(next(self._sequence) * self.batch_size, self.batch_size))
+        return {
+            "method": "POST",
+            "url": "/api/whatsapp/batch/from-csv",
+            "params": {"template_name": "bench_template", "body": "Hello from the load test"},
+            "files": {"file": ("recipients.csv", io.BytesIO(f"phone\n{rows}\n".encode()), "text/csv")}
+        }
+
+    def webhook(self) -> dict:
+        # One inbound message and a delivered/read pair per payload
+        n = next(self._sequence)
+        contact = recipients(n, 1)[0].lstrip("+")
+        message_id = f"wamid.{uuid.uuid4().hex}"
+        now = str(int(time.time()))
+        payload = {
+            "object": "whatsapp_business_account",
+            "entry": [{"id": settings.WHATSAPP_BUSINESS_ID, "changes": [{"field": "messages", "value": {
+                "messaging_product": "whatsapp",
+                "metadata": {"phone_number_id": settings.WHATSAPP_PHONE_NUMBER_ID},
+                "contacts": [{"wa_id": contact, "profile": {"name": f"Load {n}"}}],
+                "messages": [{
+                    "id": f"wamid.{uuid.uuid4().hex}",
+                    "from": contact,
+                    "timestamp": now,
+                    "type": "text",
+                    "text": {"body": "Inbound load test message"}
+                }],
+                "statuses": [
+                    {"id": message_id, "status": status, "timestamp": now, "recipient_id": contact}
+                    for status in ("delivered", "read")
+                ]
+            }}]}]
+        }
+        body = json.dumps(payload).encode()
+        signature = hmac.new(settings.WHATSAPP_APP_SECRET.encode(), body, hashlib.sha256).hexdigest()
+        return {"method": "POST", "url": "/api/whatsapp/webhook", "content": body, "headers": {
+            "Content-Type": "application/json",
+            "X-Hub-Signature-256": f"sha256={signature}"
+        }}
+
+    def dashboard(self) -> dict:
+        return {"method": "GET", "url": "/api/stats/dashboard"}
+
+SCENARIOS = ("send", "batch_template", "batch_csv", "webhook", "dashboard")
+
+async def run_scenario(client: httpx.AsyncClient, build: Callable[[], dict], duration: float, concurrency: int) -> dict:
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            request = build()
+            started = time.perf_counter()
+            try:
+                response = await client.request(**request)
+                failure = None if response.status_code < 400 else str(response.status_code)
+            except httpx.HTTPError as e:
+                failure = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            if failure:
+                errors[failure] = errors.get(failure, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(cuts[49] * 1000, 1),
+        "p95_ms": round(cuts[94] * 1000, 1),
+        "p99_ms": round(cuts[98] * 1000, 1),
+        "errors": errors
+    }
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if result["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: {result['rps']} rps, was {before['rps']}")
+        if result["p99_ms"] > before["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {result['p99_ms']} ms, was {before['p99_ms']}")
+    return regressions
+
+def server_env(args, data_dir: str, mock_port: int) -> dict:
+    env = {
+        **os.environ,
+        "GRAPH_API_BASE_URL": f"http://127.0.0.1:{mock_port}/v21.0",
+        "GRAPH_WARMUP_CONNECTIONS": "0",
+        "DATABASE_URL": os.path.join(data_dir, "messages.db"),
+        "SCHEDULER_DATABASE_PATH": os.path.join(data_dir, "scheduler.db"),
+        "WORKERS": "1",
+        "PYTHONPATH": ROOT
+    }
+    if not args.governed:
+        env.update({"GOVERNOR_INITIAL_RATE": "100000", "GOVERNOR_MAX_RATE": "100000", "GOVERNOR_BURST": "100000"})
+    return env
+
+async def main(args) -> int:
+    mock_port, app_port = free_port(), free_port()
+    mock_args = [
+        "--port", str(mock_port),
+        "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+        "--error-rate", str(args.error_rate),
+        "--rate-limit", str(args.rate_limit)
+    ]
+    token = jwt.encode({"sub": "load-test", "exp": time.time() + 3600}, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+    scenarios = Scenarios(args.batch_size)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        mock = subprocess.Popen([sys.executable, os.path.join(ROOT, "benchmarks", "mock_graph.py"), *mock_args])
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", ROOT, "--port", str(app_port), "--log-level", "warning"],
+            cwd=data_dir, env=server_env(args, data_dir, mock_port),
+            stdout=subprocess.DEVNULL, stderr=None if args.verbose else subprocess.DEVNULL
+        )
+        try:
+            await wait_until_up(f"http://127.0.0.1:{mock_port}/_stats", mock)
+            await wait_until_up(f"http://127.0.0.1:{app_port}/health", server)
+
+            results = {}
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            async with httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{app_port}",
+                headers={"Authorization": f"Bearer {token}"},
+                limits=limits,
+                timeout=60
+            ) as client:
+                for name in args.scenarios:
+                    result = await run_scenario(client, getattr(scenarios, name), args.duration, args.concurrency)
+                    results[name] = {**result, **rss_mb(server.pid)}
+                    print_result(name, result, results[name])
+                graph = (await client.get(f"http://127.0.0.1:{mock_port}/_stats")).json()
+            print(f"\nmock Graph API: {graph}")
+        finally:
+            server.terminate()
+            mock.terminate()
+            server.wait()
+            mock.wait()
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+def print_result(name: str, result: dict, memory: dict):
+    errors = sum(result["errors"].values())
+    print(
+        f"{name:<16} {result['rps']:9.1f} rps   p50 {result['p50_ms']:8.1f} ms   p95 {result['p95_ms']:8.1f} ms   "
+        f"p99 {result['p99_ms']:8.1f} ms   errors {errors:<6} rss {memory['rss_mb']} MB (peak {memory['peak_rss_mb']} MB)"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=list(SCENARIOS))
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=100, help="recipients per batch request")
+    parser.add_argument("--governed", action="store_true", help="keep the configured rate governor limits")
+    parser.add_argument("--save", help="write the results as JSON")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.15)
+    parser.add_argument("--verbose", action="store_true", help="show the application's log output")
+    add_arguments(parser)
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    sys.exit(asyncio.run(main(args)))
@@ -0,0 +1,136 @@
+"""Per-request overhead of the auth, content-type and timing middleware.
+
+Compares a bare app, the same checks written as ``@app.middleware("http")``
+functions (the previous setup) and the pure ASGI stack now used in main.py.
+Requests are driven straight through the ASGI interface, so no network or
+server cost is included.
+
+    python benchmarks/middleware_overhead.py [--requests 20000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from app.core.config import settings
+from app.middleware.auth import AuthMiddleware, public_paths, verify_jwt
+from app.middleware.content_type import ALLOWED_CONTENT_TYPES, ContentTypeMiddleware
+from app.middleware.timing import TimingMiddleware
+
+def bare_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.post("/api/echo")
+    async def echo(payload: dict):
+        return payload
+
+    return app
+
+def http_middleware_app() -> FastAPI:
+    app = bare_app()
+
+    @app.middleware("http")
+    async def auth(request: Request, call_next):
+        if public_paths.matches(request.url.path):
+            return await call_next(request)
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        verify_jwt(token)
+        return await call_next(request)
+
+    @app.middleware("http")
+    async def validate_request(request: Request, call_next):
+        if request.method in ["POST", "PUT", "PATCH"]:
+            if not request.headers.get("content-type", "").startswith(ALLOWED_CONTENT_TYPES):
+                return JSONResponse(status_code=400, content={"detail": "bad content type"})
+        return await call_next(request)
+
+    @app.middleware("http")
+    async def timing(request: Request, call_next):
+        start = time.perf_counter()
+        response = await call_next(request)
+        response.headers["x-process-time"] = f"{time.perf_counter() - start:.6f}"
+        return response
+
+    return app
+
+def asgi_middleware_app() -> FastAPI:
+    app = bare_app()
+    app.add_middleware(AuthMiddleware)
+    app.add_middleware(ContentTypeMiddleware)
+    app.add_middleware(TimingMiddleware)
+    return app
+
+async def call(app, method: str, path: str, headers, body: bytes = b""):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8000)
+    }
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    status = None
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+async def measure(app, requests: int, method: str, path: str, headers, body: bytes) -> float:
+    # Warm up routing, validation and the token cache
+    for _ in range(200):
+        assert await call(app, method, path, headers, body) == 200
+    start = time.perf_counter()
+    for _ in range(requests):
+        await call(app, method, path, headers, body)
+    return (time.perf_counter() - start) / requests * 1e6
+
+async def main(requests: int):
+    token = jwt.encode({"exp": time.time() + 3600}, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+    auth = (b"authorization", f"Bearer {token}".encode())
+    cases = [
+        ("GET /api/ping", "GET", "/api/ping", [auth], b""),
+        ("POST /api/echo", "POST", "/api/echo", [auth, (b"content-type", b"application/json")], b'{"a": 1}')
+    ]
+    apps = [("bare", bare_app()), ("http middleware", http_middleware_app()), ("asgi middleware", asgi_middleware_app())]
+
+    print(f"{'case':<16} {'stack':<16} {'us/request':>11} {'overhead us':>12}")
+    for label, method, path, headers, body in cases:
+        baseline = None
+        for name, app in apps:
+            per_request = await measure(app, requests, method, path, headers, body)
+            baseline = per_request if baseline is None else baseline
+            print(f"{label:<16} {name:<16} {per_request:>11.1f} {per_request - baseline:>12.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    asyncio.run(main(parser.parse_args().requests))
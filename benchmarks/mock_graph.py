@@ -0,0 +1,151 @@
+"""Local stand-in for the Graph API, for offline load tests.
+
+Answers message sends and template calls with Graph-shaped responses after
+a configurable delay. A share of requests can fail with a transient 500,
+and sends beyond a per-account rate get Meta's rate-limit error, so the
+circuit breakers and the rate governor can be exercised too.
+
+    python benchmarks/mock_graph.py [--port 9100] [--latency-ms 80] [--jitter-ms 40]
+                                    [--error-rate 0.0] [--rate-limit 0]
+
+Point the application at it with GRAPH_API_BASE_URL=http://127.0.0.1:9100/v21.0.
+GET /_stats returns the request counters.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Dict, Tuple
+
+import uvicorn
+
+TEMPLATES = [{
+    "id": "1000000000000001",
+    "name": "bench_template",
+    "language": "en",
+    "status": "APPROVED",
+    "category": "MARKETING",
+    "components": [{"type": "BODY", "text": "Hello from the load test"}]
+}]
+
+# WhatsApp Cloud API and Instagram messaging rate-limit codes
+WHATSAPP_THROTTLED = 130429
+INSTAGRAM_THROTTLED = 613
+
+class MockGraph:
+    """Pure ASGI app imitating the Graph endpoints the clients call"""
+
+    def __init__(self, latency_ms: float, jitter_ms: float, error_rate: float, rate_limit: float):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        # account -> (tokens, updated)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self.counters = {"requests": 0, "sent": 0, "errors": 0, "throttled": 0}
+
+    async def __call__(self, scope, receive, send):
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        if scope["path"] == "/_stats":
+            return await self._respond(send, 200, self.counters)
+
+        self.counters["requests"] += 1
+        delay = max(self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms), 0)
+        await asyncio.sleep(delay / 1000)
+        status, payload = self._handle(scope["method"], scope["path"], body)
+        await self._respond(send, status, payload)
+
+    def _handle(self, method: str, path: str, body: bytes) -> Tuple[int, dict]:
+        segments = [segment for segment in path.split("/") if segment]
+        # /{version}/{account}/{edge}
+        account = segments[1] if len(segments) > 1 else ""
+        edge = segments[2] if len(segments) > 2 else ""
+
+        if method in ("GET", "HEAD") and edge != "message_templates":
+            return 200, {"id": account}
+
+        if self.error_rate and random.random() < self.error_rate:
+            self.counters["errors"] += 1
+            return 500, {"error": {
+                "code": 2,
+                "message": "Service temporarily unavailable",
+                "is_transient": True
+            }}
+
+        if edge == "message_templates":
+            if method == "GET":
+                return 200, {"data": TEMPLATES, "paging": {}}
+            if method == "DELETE":
+                return 200, {"success": True}
+            return 200, {"id": uuid.uuid4().hex, "status": "PENDING", "category": "MARKETING"}
+
+        if edge != "messages":
+            return 404, {"error": {"code": 100, "message": f"Unknown path {path}"}}
+
+        payload = json.loads(body or b"{}")
+        is_whatsapp = payload.get("messaging_product") == "whatsapp"
+        if not self._take_token(account):
+            self.counters["throttled"] += 1
+            return 400, {"error": {
+                "code": WHATSAPP_THROTTLED if is_whatsapp else INSTAGRAM_THROTTLED,
+                "message": "Rate limit hit"
+            }}
+
+        self.counters["sent"] += 1
+        if is_whatsapp:
+            if payload.get("status") == "read":
+                return 200, {"success": True}
+            to = payload.get("to", "")
+            return 200, {
+                "messaging_product": "whatsapp",
+                "contacts": [{"input": to, "wa_id": to.lstrip("+")}],
+                "messages": [{"id": f"wamid.{uuid.uuid4().hex}"}]
+            }
+        return 200, {
+            "recipient_id": payload.get("recipient", {}).get("id"),
+            "message_id": f"m_{uuid.uuid4().hex}"
+        }
+
+    def _take_token(self, account: str) -> bool:
+        if not self.rate_limit:
+            return True
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(account, (self.rate_limit, now))
+        tokens = min(self.rate_limit, tokens + (now - updated) * self.rate_limit)
+        if tokens < 1:
+            self._buckets[account] = (tokens, now)
+            return False
+        self._buckets[account] = (tokens - 1, now)
+        return True
+
+    @staticmethod
+    async def _respond(send, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--jitter-ms", type=float, default=40)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with a transient 500")
+    parser.add_argument("--rate-limit", type=float, default=0, help="sends per second per account, 0 for unlimited")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=9100)
+    add_arguments(parser)
+    args = parser.parse_args()
+    app = MockGraph(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning", lifespan="off")
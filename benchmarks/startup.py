@@ -0,0 +1,93 @@
+"""Cold-start cost of the application.
+
+Measures, each in a fresh interpreter, how long ``import main`` takes and how
+long it takes from launching uvicorn until ``/health`` first answers 200.
+Exits with status 1 if the median of either exceeds its target, so it can
+guard against heavy imports creeping back onto the startup path.
+
+    python benchmarks/startup.py [--runs 5] [--import-target-ms 700] [--health-target-ms 2500]
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import main; print((time.perf_counter() - t) * 1000)"
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def isolated_env(work_dir: str) -> dict:
+    # Databases and app.log go to work_dir, which is also the CWD, not the checkout.
+    # Everything else, Graph connection warm-up included, keeps its default.
+    return {
+        **os.environ,
+        "PYTHONPATH": ROOT,
+        "DATABASE_URL": os.path.join(work_dir, "messages.db"),
+        "SCHEDULER_DATABASE_PATH": os.path.join(work_dir, "scheduler.db")
+    }
+
+def import_ms(work_dir: str) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=work_dir, env=isolated_env(work_dir), capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+def health_ms(work_dir: str, timeout: float = 30.0) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", ROOT, "--port", str(port), "--log-level", "warning"],
+        cwd=work_dir, env=isolated_env(work_dir),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited with status {server.returncode}")
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health", timeout=0.5).status_code == 200:
+                    return (time.perf_counter() - started) * 1000
+            except httpx.TransportError:
+                pass
+            time.sleep(0.01)
+        raise RuntimeError(f"/health did not answer within {timeout:.0f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+def report(name: str, samples: list, target: float) -> bool:
+    median = statistics.median(samples)
+    ok = median <= target
+    print(
+        f"{name:<16} median {median:8.1f} ms   min {min(samples):8.1f} ms   "
+        f"max {max(samples):8.1f} ms   target {target:.0f} ms   {'ok' if ok else 'EXCEEDED'}"
+    )
+    return ok
+
+def main(runs: int, import_target: float, health_target: float) -> int:
+    with tempfile.TemporaryDirectory() as work_dir:
+        imports = [import_ms(work_dir) for _ in range(runs)]
+        healths = [health_ms(work_dir) for _ in range(runs)]
+    ok = report("import main", imports, import_target)
+    ok = report("first /health", healths, health_target) and ok
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-target-ms", type=float, default=700)
+    parser.add_argument("--health-target-ms", type=float, default=2500)
+    args = parser.parse_args()
+    sys.exit(main(args.runs, args.import_target_ms, args.health_target_ms))
@@ -1,7 +1,8 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
@@ -9,14 +10,54 @@ from prometheus_fastapi_instrumentator import Instrumentator
 from app.utils.db import db
 import logging.config
 from app.core.logging_config import LOGGING_CONFIG
-from app.api import whatsapp, instagram, template_routes, stats
+from app.api import whatsapp, instagram, template_routes, stats, outbox as outbox_routes
 from app.core.config import settings
-from app.middleware.auth import auth_middleware
+from app.middleware.auth import AuthMiddleware
+from app.middleware.content_type import ContentTypeMiddleware
+from app.middleware.timing import TimingMiddleware
+from app.clients.http import transport
+from app.clients.breaker import CircuitOpenError
+from app.core.scheduler import SchedulerBusyError, scheduler
+from app.core.leader import LeaderElection
+from app.utils.monitoring import init_sentry
+from app.utils.phone_validator import shutdown_process_pool
+from app.services.webhooks import webhook_ingestor
+from app.services.outbox import outbox
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background services start here, not at import
+    try:
+        init_sentry()
+        await db.connect()
+        await transport.start()
+        webhook_ingestor.start()
+        outbox.start()
+        # Every worker can store jobs, only the elected one runs them
+        scheduler.start(paused=True)
+        app.state.leader = LeaderElection("scheduler", on_elected=scheduler.resume, on_demoted=scheduler.pause)
+        await app.state.leader.start()
+        logger.info("Application startup completed")
+    except Exception as e:
+        logger.critical(f"Failed to start application: {str(e)}", exc_info=True)
+        raise
+
+    yield
+
+    await app.state.leader.stop()
+    scheduler.shutdown()
+    await webhook_ingestor.stop()
+    await outbox.stop()
+    await transport.close()
+    await db.close()
+    shutdown_process_pool()
+    logger.info("Application shutdown completed")
 
 app = FastAPI(
     title="Meta Messaging API",
     description="API for WhatsApp and Instagram messaging",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure logging
@@ -28,6 +69,23 @@ limiter = Limiter(key_func=get_remote_address)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(int(exc.retry_after + 0.999), 1))}
+    )
+
+@app.exception_handler(SchedulerBusyError)
+async def scheduler_busy_handler(request: Request, exc: SchedulerBusyError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+# Request middleware is pure ASGI. Starlette runs the last-added middleware
+# first, so CORS answers preflight requests before authentication.
+app.add_middleware(AuthMiddleware)
+app.add_middleware(ContentTypeMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -43,41 +101,15 @@ app.add_middleware(TrustedHostMiddleware, allowed_hosts=settings.ALLOWED_HOSTS)
 # Metrics
 Instrumentator().instrument(app).expose(app)
 
+# Outermost, so the timing covers the whole stack
+app.add_middleware(TimingMiddleware)
+
 # Include routers
 app.include_router(whatsapp.router, prefix="/api/whatsapp", tags=["WhatsApp"])
 app.include_router(instagram.router, prefix="/api/instagram", tags=["Instagram"])
 app.include_router(template_routes.router, prefix="/api/templates", tags=["Templates"])
 app.include_router(stats.router, prefix="/api/stats", tags=["Statistics"])
-
-@app.on_event("startup")
-async def startup_event():
-    try:
-        await db.connect()
-        logger.info("Application startup completed")
-    except Exception as e:
-        logger.critical(f"Failed to start application: {str(e)}", exc_info=True)
-        raise
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    await db.close()
-    logger.info("Application shutdown completed")
-
-# Add authentication middleware
-app.middleware("http")(auth_middleware)
-
-# Add request validation middleware
-@app.middleware("http")
-async def validate_request(request: Request, call_next):
-    if request.method in ["POST", "PUT", "PATCH"]:
-        content_type = request.headers.get("content-type", "")
-        if not content_type.startswith("application/json"):
-            return JSONResponse(
-                status_code=400,
-                content={"detail": "Content-Type must be application/json"}
-            )
-    response = await call_next(request)
-    return response
+app.include_router(outbox_routes.router, prefix="/api/outbox", tags=["Outbox"])
 
 @app.get("/health")
 async def health_check():
@@ -85,4 +117,11 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    # Reload only makes sense for a single development worker
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=settings.WORKERS,
+        reload=settings.WORKERS == 1 and not settings.is_production
+    )
@@ -0,0 +1,42 @@
+import os
+import sys
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.utils.db import db
+
+def fresh_database(tmp_path):
+    # Each test runs its own event loop, so the singleton's locks are rebuilt too
+    db.__init__()
+    db.db_path = str(tmp_path / "messages.db")
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+async def database(tmp_path):
+    """The application database, migrated into a fresh file for each test"""
+    fresh_database(tmp_path)
+    await db.connect()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """An authenticated client of the running application, on fresh databases"""
+    import main
+
+    monkeypatch.setattr(settings, "GRAPH_WARMUP_CONNECTIONS", 0)
+    monkeypatch.setattr(settings, "SCHEDULER_DATABASE_PATH", str(tmp_path / "scheduler.db"))
+    fresh_database(tmp_path)
+    token = jwt.encode({"sub": "test"}, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+    with TestClient(main.app, headers={"Authorization": f"Bearer {token}"}) as client:
+        yield client
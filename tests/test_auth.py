@@ -0,0 +1,49 @@
+import hashlib
+import hmac
+import time
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.middleware import auth
+from app.middleware.auth import token_cache, verify_jwt, verify_webhook_signature
+
+def token(**claims) -> str:
+    return jwt.encode({"sub": "test", **claims}, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+def test_service_token_without_exp_is_accepted_and_cached_for_the_ttl(monkeypatch):
+    service_token = token()
+    assert verify_jwt(service_token)["sub"] == "test"
+    assert token_cache.get(token_cache.key(service_token)) is not None
+
+    now = time.time() + settings.AUTH_TOKEN_CACHE_TTL + 1
+    monkeypatch.setattr(auth.time, "time", lambda: now)
+    assert token_cache.get(token_cache.key(service_token)) is None
+
+def test_cached_token_does_not_outlive_its_exp(monkeypatch):
+    short_token = token(exp=time.time() + 5)
+    verify_jwt(short_token)
+    now = time.time() + 6
+    monkeypatch.setattr(auth.time, "time", lambda: now)
+    assert token_cache.get(token_cache.key(short_token)) is None
+
+def test_expired_token_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        verify_jwt(token(exp=time.time() - 5))
+    assert error.value.detail == "Token has expired"
+
+def test_webhook_signature():
+    body = b'{"object": "whatsapp_business_account"}'
+    digest = hmac.new(settings.WHATSAPP_APP_SECRET.encode(), body, hashlib.sha256).hexdigest()
+    assert verify_webhook_signature(body, f"sha256={digest}")
+    assert not verify_webhook_signature(body + b" ", f"sha256={digest}")
+    assert not verify_webhook_signature(body, digest)
+    assert not verify_webhook_signature(body, None)
@@ -0,0 +1,82 @@
+import pytest
+
+from app.clients import breaker as breaker_module
+from app.clients.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, endpoint_for_url
+from app.core.config import settings
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(breaker_module.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(settings, "CIRCUIT_MIN_REQUESTS", 4)
+    monkeypatch.setattr(settings, "CIRCUIT_FAILURE_RATE", 0.5)
+    monkeypatch.setattr(settings, "CIRCUIT_OPEN_SECONDS", 10)
+    monkeypatch.setattr(settings, "CIRCUIT_HALF_OPEN_PROBES", 2)
+    return clock
+
+def trip(breaker: CircuitBreaker):
+    for ok in (True, True, False, False):
+        breaker.record(ok, breaker.allow())
+
+def test_opens_once_failure_rate_is_reached(clock):
+    breaker = CircuitBreaker("messages", "123")
+    for ok in (True, True, False):
+        breaker.record(ok, breaker.allow())
+    assert breaker.state == CLOSED
+    breaker.record(False, breaker.allow())
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+def test_half_open_probes_close_the_circuit(clock):
+    breaker = CircuitBreaker("messages", "123")
+    trip(breaker)
+    clock.now += 10
+
+    probes = [breaker.allow(), breaker.allow()]
+    assert probes == [True, True]
+    assert breaker.state == HALF_OPEN
+    # No more calls than probes while they are out
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    for probe in probes:
+        breaker.record(True, probe)
+    assert breaker.state == CLOSED
+    assert breaker.stats()["requests"] == 0
+
+def test_failed_probe_reopens_the_circuit(clock):
+    breaker = CircuitBreaker("messages", "123")
+    trip(breaker)
+    clock.now += 10
+    breaker.record(False, breaker.allow())
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+def test_released_probe_frees_its_slot(clock):
+    breaker = CircuitBreaker("messages", "123")
+    trip(breaker)
+    clock.now += 10
+    breaker.release(breaker.allow())
+    breaker.release(breaker.allow())
+    assert breaker.allow() is True
+
+def test_old_outcomes_leave_the_window(clock):
+    breaker = CircuitBreaker("messages", "123")
+    for _ in range(3):
+        breaker.record(False)
+    clock.now += settings.CIRCUIT_WINDOW_SECONDS + 1
+    breaker.record(False)
+    assert breaker.state == CLOSED
+    assert breaker.stats()["requests"] == 1
+
+def test_endpoint_for_url_ignores_the_api_version():
+    assert endpoint_for_url("https://graph.facebook.com/v21.0/123/messages") == ("messages", "123")
+    assert endpoint_for_url("https://graph.facebook.com/123") == ("node", "123")
@@ -0,0 +1,17 @@
+import json
+
+from app.clients.whatsapp import CompiledTemplate, WhatsAppClient
+from app.models.messages import TemplateContent
+
+def test_render_matches_encoding_the_full_payload():
+    payload = {"messaging_product": "whatsapp", "type": "template", "template": {"name": "promo"}}
+    compiled = CompiledTemplate(payload)
+    for phone in ("+14155550100", 'quote"and\\slash', "ünïcode"):
+        assert json.loads(compiled.render(phone)) == {**payload, "to": phone}
+
+def test_compiled_batch_template_renders_per_recipient():
+    client = WhatsAppClient()
+    content = TemplateContent(body="Hello")
+    compiled = client.compile_template("promo", content, "en")
+    expected = {**client._template_payload("promo", content, "en"), "to": "+14155550100"}
+    assert json.loads(compiled.render("+14155550100")) == expected
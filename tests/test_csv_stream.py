@@ -0,0 +1,27 @@
+import pytest
+
+from app.utils.csv_stream import iter_csv_column
+
+pytestmark = pytest.mark.anyio
+
+async def column(data: bytes, chunk_size: int, column: int = 0) -> list:
+    position = 0
+
+    async def read(size: int) -> bytes:
+        nonlocal position
+        chunk = data[position:position + size]
+        position += len(chunk)
+        return chunk
+
+    return [value async for chunk in iter_csv_column(read, chunk_size, column) for value in chunk]
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1024])
+async def test_quoted_fields_survive_chunk_boundaries(chunk_size):
+    data = b'phone,note\r\n+14155550100,"two\nlines"\r\n"+1415555,0101","say ""hi"""\n+14155550102,last'
+    assert await column(data, chunk_size) == ["+14155550100", "+1415555,0101", "+14155550102"]
+    assert await column(data, chunk_size, column=1) == ["two\nlines", 'say "hi"', "last"]
+
+async def test_only_newlines_end_rows():
+    data = "phone,note\n+14155550100,a\x0cb c\n+14155550101,d\x85e\n".encode()
+    assert await column(data, 4, column=1) == ["a\x0cb c", "d\x85e"]
+    assert await column(data, 4) == ["+14155550100", "+14155550101"]
@@ -0,0 +1,76 @@
+import json
+import sqlite3
+
+import pytest
+
+from app.utils import dedup as dedup_module
+from app.utils.dedup import EventDeduplicator
+
+pytestmark = pytest.mark.anyio
+
+async def test_repeated_keys_are_filtered():
+    dedup = EventDeduplicator(max_entries=10, ttl=60)
+    assert await dedup.filter_new(["a", "b", "a"]) == {"a", "b"}
+    assert await dedup.filter_new(["a", "c"]) == {"c"}
+    assert dedup.stats()["hits"] == 1
+
+async def test_keys_expire_after_the_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(dedup_module.time, "monotonic", lambda: now[0])
+    dedup = EventDeduplicator(max_entries=10, ttl=5)
+    await dedup.filter_new(["a"])
+    now[0] += 6
+    assert await dedup.filter_new(["a"]) == {"a"}
+
+async def test_oldest_keys_are_evicted_first():
+    dedup = EventDeduplicator(max_entries=2, ttl=60)
+    await dedup.filter_new(["a", "b", "c"])
+    assert len(dedup) == 2
+    assert await dedup.filter_new(["a", "c"]) == {"a"}
+
+async def test_evicted_keys_are_checked_against_the_store():
+    stored = set()
+
+    async def find_seen(keys):
+        return stored.intersection(keys)
+
+    async def mark_seen(keys):
+        stored.update(keys)
+
+    dedup = EventDeduplicator(max_entries=1, ttl=60, find_seen=find_seen, mark_seen=mark_seen)
+    assert await dedup.filter_new(["a"]) == {"a"}
+    # Nothing reaches the store until the events are committed
+    assert stored == set()
+    await dedup.commit(["a"])
+    await dedup.filter_new(["b"])
+    assert await dedup.filter_new(["a"]) == set()
+    assert dedup.stats()["store_hits"] == 1
+
+async def test_released_keys_are_accepted_again():
+    dedup = EventDeduplicator(max_entries=10, ttl=60)
+    await dedup.filter_new(["a", "b"])
+    dedup.release(["a"])
+    assert await dedup.filter_new(["a", "b"]) == {"a"}
+
+async def test_webhook_batch_that_fails_to_store_is_processed_on_redelivery(database, monkeypatch):
+    from app.services import webhooks
+    from app.utils.db import get_inbound_messages
+
+    body = json.dumps({"entry": [{"changes": [{"value": {
+        "metadata": {"phone_number_id": "1"},
+        "messages": [{"id": "wamid.in", "from": "14155550100", "timestamp": "1700000000", "type": "text", "text": {"body": "hi"}}]
+    }}]}]}).encode()
+    ingestor = webhooks.WebhookIngestor()
+    save = webhooks.save_inbound_messages
+
+    async def locked(messages):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(webhooks, "save_inbound_messages", locked)
+    with pytest.raises(sqlite3.OperationalError):
+        await ingestor._process([body])
+    monkeypatch.setattr(webhooks, "save_inbound_messages", save)
+    await ingestor._process([body])
+
+    assert [message["message_id"] for message in await get_inbound_messages("14155550100")] == ["wamid.in"]
+    assert ingestor.duplicates == 0
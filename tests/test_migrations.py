@@ -0,0 +1,27 @@
+import asyncio
+
+import aiosqlite
+import pytest
+
+from app.utils.migrations import MIGRATIONS, get_schema_version, run_migrations
+
+pytestmark = pytest.mark.anyio
+
+LATEST = MIGRATIONS[-1][0]
+
+async def test_fresh_database_is_migrated_to_latest(tmp_path):
+    async with aiosqlite.connect(tmp_path / "messages.db") as conn:
+        assert await run_migrations(conn) == LATEST
+        assert await get_schema_version(conn) == LATEST
+        # Running again is a no-op
+        assert await run_migrations(conn) == LATEST
+
+async def test_concurrent_runners_apply_each_migration_once(tmp_path):
+    path = tmp_path / "messages.db"
+    connections = [await aiosqlite.connect(path, timeout=10) for _ in range(4)]
+    try:
+        versions = await asyncio.gather(*(run_migrations(conn) for conn in connections))
+        assert versions == [LATEST] * len(connections)
+    finally:
+        for conn in connections:
+            await conn.close()
@@ -0,0 +1,136 @@
+import json
+
+import httpx
+import pytest
+
+from app.clients.governor import governor
+from app.clients.http import transport
+from app.core.config import settings
+from app.services.outbox import OutboxDrainer
+from app.utils.db import claim_outbox, db, get_outbox_entry
+
+
+# Far enough ahead that every backoff has elapsed
+LATER = 10 ** 10
+
+def graph(*responses):
+    """Route Graph calls to the given responses, one per call"""
+    queue = list(responses)
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(json.loads(request.content))
+        return queue.pop(0)
+
+    transport._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return calls
+
+def sent(message_id: str = "wamid.1") -> httpx.Response:
+    return httpx.Response(200, json={"messaging_product": "whatsapp", "messages": [{"id": message_id}]})
+
+def transient() -> httpx.Response:
+    return httpx.Response(500, json={"error": {"code": 2, "message": "Service unavailable", "is_transient": True}})
+
+@pytest.fixture
+async def drainer(database, monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(settings, "OUTBOX_BACKOFF_BASE_SECONDS", 0.01)
+    monkeypatch.setattr(settings, "CIRCUIT_MIN_REQUESTS", 10 ** 6)
+    drainer = OutboxDrainer()
+    drainer.start()
+    await drainer.stop()
+    yield drainer
+    await transport.close()
+
+async def enqueue(drainer: OutboxDrainer) -> str:
+    return await drainer.enqueue("whatsapp", "text", "+14155550100", {"message": "hello"})
+
+async def deliver_due(drainer: OutboxDrainer, now: float = LATER) -> list:
+    entries = await claim_outbox(10, now, settings.OUTBOX_LEASE_SECONDS, settings.OUTBOX_MAX_ATTEMPTS)
+    results = [await drainer._deliver(entry) for entry in entries]
+    # Completions and retries go through the group-commit writer
+    await db.writer.flush()
+    return results
+
+@pytest.mark.anyio
+async def test_transient_error_is_retried_then_delivered(drainer):
+    calls = graph(transient(), sent("wamid.ok"))
+    outbox_id = await enqueue(drainer)
+
+    [failed] = await deliver_due(drainer)
+    assert failed["status"] == "error"
+    entry = await get_outbox_entry(outbox_id)
+    assert (entry["status"], entry["attempts"]) == ("pending", 1)
+    assert entry["last_error"].startswith("2:")
+
+    [delivered] = await deliver_due(drainer)
+    assert delivered == {"recipient": "+14155550100", "status": "success", "message_id": "wamid.ok"}
+    entry = await get_outbox_entry(outbox_id)
+    assert (entry["status"], entry["message_id"], entry["attempts"]) == ("sent", "wamid.ok", 2)
+    assert len(calls) == 2
+
+@pytest.mark.anyio
+async def test_permanent_error_is_dead_lettered_at_once(drainer):
+    graph(httpx.Response(400, json={"error": {"code": 131026, "message": "Message undeliverable"}}))
+    outbox_id = await enqueue(drainer)
+
+    await deliver_due(drainer)
+    entry = await get_outbox_entry(outbox_id)
+    assert (entry["status"], entry["attempts"]) == ("dead", 1)
+    assert "131026" in entry["last_error"]
+
+@pytest.mark.anyio
+async def test_non_json_error_is_retried_until_attempts_run_out(drainer):
+    graph(*[httpx.Response(502, text="<html>Bad Gateway</html>") for _ in range(2)])
+    outbox_id = await enqueue(drainer)
+
+    await deliver_due(drainer)
+    assert (await get_outbox_entry(outbox_id))["status"] == "pending"
+    await deliver_due(drainer)
+    entry = await get_outbox_entry(outbox_id)
+    assert (entry["status"], entry["attempts"]) == ("dead", 2)
+    assert entry["last_error"]
+    assert drainer.dead == 1
+
+@pytest.mark.anyio
+async def test_expired_lease_is_reclaimed_until_attempts_run_out(drainer):
+    graph()
+    outbox_id = await enqueue(drainer)
+    lease = settings.OUTBOX_LEASE_SECONDS
+
+    # A worker claims the row and dies without answering, twice
+    [first] = await claim_outbox(10, LATER, lease, settings.OUTBOX_MAX_ATTEMPTS)
+    assert first["outbox_id"] == outbox_id
+    assert await claim_outbox(10, LATER, lease, settings.OUTBOX_MAX_ATTEMPTS) == []
+    [second] = await claim_outbox(10, LATER + lease + 1, lease, settings.OUTBOX_MAX_ATTEMPTS)
+    assert second["attempts"] == 2
+
+    assert await claim_outbox(10, LATER + 2 * lease + 2, lease, settings.OUTBOX_MAX_ATTEMPTS) == []
+    entry = await get_outbox_entry(outbox_id)
+    assert (entry["status"], entry["last_error"]) == ("dead", "Lease expired while sending")
+
+@pytest.mark.anyio
+async def test_claim_fits_within_half_a_lease_at_the_governed_rate(drainer, monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_LEASE_SECONDS", 30)
+    monkeypatch.setattr(governor.bucket(drainer.whatsapp.governor_key), "rate", 2.0)
+    assert drainer._claim_size() == 30
+    monkeypatch.setattr(governor.bucket(drainer.whatsapp.governor_key), "rate", 0.01)
+    assert drainer._claim_size() == 1
+
+@pytest.mark.parametrize("path, body", [
+    ("/api/whatsapp/send", {"recipient": "+14155550100", "message": "hi", "scheduled_time": "2030-01-01T00:00:00Z"}),
+    ("/api/whatsapp/send_template", {"recipient": "+14155550100", "template_name": "promo", "components": []}),
+    ("/api/templates/send", {"recipient": "+14155550100", "template_name": "promo", "components": []}),
+    ("/api/instagram/send", {"recipient_id": "1784", "message": "hi"}),
+    ("/api/instagram/send-media", {"recipient_id": "1784", "media_url": "https://example.com/a.jpg", "media_type": "image"})
+])
+def test_single_sends_answer_inline_unless_outbox_mode_is_on(client, monkeypatch, path, body):
+    graph(sent("wamid.inline"), sent("wamid.inline"))
+    response = client.post(path, json=body)
+    assert response.status_code == 200
+    assert "outbox_id" not in response.json()
+
+    monkeypatch.setattr(settings, "OUTBOX_MODE", True)
+    response = client.post(path, json=body)
+    assert response.status_code == 202
+    assert response.json()["status"] == "pending"
@@ -0,0 +1,34 @@
+import pytest
+
+from app.utils.db import save_inbound_messages, save_message
+
+RECIPIENT = "+14155550100"
+
+@pytest.fixture
+def client(client):
+    client.portal.call(save_message, {"recipient": RECIPIENT, "message": "hi"}, "wamid.1")
+    client.portal.call(save_inbound_messages, [{
+        "id": "wamid.in", "from": RECIPIENT.lstrip("+"), "type": "text", "body": "hello",
+        "payload": {"text": {"body": "hello"}}, "timestamp": "1700000000"
+    }])
+    return client
+
+def test_history_is_served_through_its_response_model(client):
+    [message] = client.get(f"/api/whatsapp/history/{RECIPIENT}").json()
+    assert message["message_id"] == "wamid.1"
+    assert message["content"]["message"] == "hi"
+    assert message["status"] == "sent"
+
+def test_inbound_history(client):
+    [message] = client.get(f"/api/whatsapp/inbound/{RECIPIENT.lstrip('+')}").json()
+    assert (message["message_id"], message["body"], message["timestamp"]) == ("wamid.in", "hello", 1700000000)
+    assert message["payload"] == {"text": {"body": "hello"}}
+
+def test_dashboard_and_timeseries(client):
+    dashboard = client.get("/api/stats/dashboard").json()
+    assert dashboard["total_messages"] == 1
+    assert dashboard["recent_messages"][0]["recipient"] == RECIPIENT
+
+    series = client.get("/api/stats/timeseries", params={"granularity": "day"}).json()
+    assert series["granularity"] == "day"
+    assert series["series"][0]["total"] == 1
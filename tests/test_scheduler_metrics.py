@@ -0,0 +1,23 @@
+import threading
+
+from app.core.scheduler import scheduler
+
+def test_metrics_scrape_reads_cached_job_counts(client, monkeypatch):
+    threads = []
+    count_jobs = scheduler.jobstore.count_jobs
+
+    def counting():
+        threads.append(threading.current_thread())
+        return count_jobs()
+
+    monkeypatch.setattr(scheduler.jobstore, "count_jobs", counting)
+    monkeypatch.setattr(scheduler, "job_counts", {"stored": 7, "overdue": 2})
+
+    metrics = client.get("/metrics").text
+    assert 'scheduler_jobs{state="stored"} 7.0' in metrics
+    assert 'scheduler_jobs{state="overdue"} 2.0' in metrics
+    assert threads == []
+
+def test_job_counts_are_refreshed_in_the_background(client):
+    assert scheduler._counter is not None and not scheduler._counter.done()
+    assert scheduler._count_jobs() == {"stored": 0, "overdue": 0}
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from app.utils.db import get_message_history, save_message, update_message_status
+
+pytestmark = pytest.mark.anyio
+
+RECIPIENT = "+14155550100"
+
+async def stored_status(message_id: str) -> str:
+    history = await get_message_history(RECIPIENT)
+    return next(row["status"] for row in history if row["message_id"] == message_id)
+
+async def test_status_never_moves_backwards(database):
+    await save_message({"recipient": RECIPIENT, "message": "hi"}, "wamid.1")
+
+    await update_message_status("wamid.1", "read")
+    # A late "delivered" in a later flush window must not overwrite "read"
+    await update_message_status("wamid.1", "delivered")
+    assert await stored_status("wamid.1") == "read"
+
+    await update_message_status("wamid.1", "played")
+    assert await stored_status("wamid.1") == "played"
+
+async def test_updates_in_one_window_collapse_to_the_highest(database):
+    await save_message({"recipient": RECIPIENT, "message": "hi"}, "wamid.2")
+    applied = database.statuses.applied
+
+    await update_message_status("wamid.2", "read", wait=False)
+    await update_message_status("wamid.2", "delivered", wait=False)
+    await update_message_status("wamid.2", "sent")
+    assert await stored_status("wamid.2") == "read"
+    assert database.statuses.applied - applied == 1
+
+async def test_stop_applies_updates_submitted_during_the_final_flush(database):
+    await save_message({"recipient": RECIPIENT, "message": "hi"}, "wamid.3")
+    await save_message({"recipient": RECIPIENT, "message": "hi"}, "wamid.4")
+    coalescer = database.statuses
+    flush_writer = coalescer._before_flush
+    late = []
+
+    async def before_flush():
+        if not late:
+            late.append(asyncio.create_task(update_message_status("wamid.4", "read")))
+            await asyncio.sleep(0)
+        await flush_writer()
+
+    coalescer._before_flush = before_flush
+    await update_message_status("wamid.3", "read", wait=False)
+    await coalescer.stop()
+
+    await asyncio.wait_for(late[0], 1)
+    assert coalescer.pending == 0
+    assert await stored_status("wamid.3") == "read"
+    assert await stored_status("wamid.4") == "read"
+    with pytest.raises(RuntimeError):
+        await update_message_status("wamid.3", "played")
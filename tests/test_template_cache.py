@@ -0,0 +1,34 @@
+import pytest
+
+from app.services.template_cache import TemplateCatalog
+
+pytestmark = pytest.mark.anyio
+
+class Client:
+    """Fake Graph client that can invalidate the catalog mid-fetch"""
+
+    def __init__(self, invalidations: int):
+        self.catalog = None
+        self.invalidations = invalidations
+        self.calls = 0
+
+    async def get_all_templates(self) -> dict:
+        self.calls += 1
+        if self.invalidations:
+            self.invalidations -= 1
+            self.catalog.invalidate()
+        return {"data": [{"name": "welcome", "language": "en", "calls": self.calls}]}
+
+def catalog(invalidations: int) -> TemplateCatalog:
+    client = Client(invalidations)
+    client.catalog = TemplateCatalog(client=client, ttl=60)
+    return client.catalog
+
+async def test_list_refetches_until_a_fetch_outlives_invalidation():
+    templates = await catalog(invalidations=3).list()
+    assert templates == [{"name": "welcome", "language": "en", "calls": 4}]
+
+async def test_get_refetches_until_a_fetch_outlives_invalidation():
+    cached = catalog(invalidations=2)
+    assert (await cached.get("welcome", "en"))["calls"] == 3
+    assert cached.client.calls == 3
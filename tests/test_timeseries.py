@@ -0,0 +1,20 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.utils.db import get_message_timeseries, save_message, update_message_status
+
+pytestmark = pytest.mark.anyio
+
+async def test_delivery_rate_counts_every_status_past_delivered(database):
+    for index, status in enumerate(("sent", "delivered", "read", "played", "failed")):
+        message_id = f"wamid.{index}"
+        await save_message({"recipient": "+14155550100", "message": "hi"}, message_id)
+        if status != "sent":
+            await update_message_status(message_id, status)
+
+    now = datetime.utcnow()
+    [point] = await get_message_timeseries("day", now - timedelta(days=1), now + timedelta(days=1))
+    assert point["total"] == 5
+    assert point["delivered"] == 3
+    assert point["delivery_rate"] == 0.6